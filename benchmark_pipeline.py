@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк конвеєра: витягування з EPUB, генерація календарів та імпорт у PostgreSQL
+
+Синтетичні корпуси - копії mifolohiia.epub, у яких кожен розділ книги
+повторено 1, 10 або 100 разів. Кожен етап запускається окремим процесом у
+тимчасовому каталозі так само, як його запускають вручну, і заміряється
+час. Імпорт виконується в тимчасову БД, яка видаляється після запуску;
+при масштабі N імпортується N варіантів календаря одночасно.
+
+Результати можна зберегти як базові (benchmark_baseline.json) і
+порівнювати з ними наступні запуски після зміни патернів чи парсера.
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import platform
+import posixpath
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from urllib.parse import unquote
+
+from calendar_source import CSV_FIELDS, SOURCE_CSV
+from extract_dates_from_epub import CONTAINER_NS, EPUB_FILE, OPF_NS
+
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+IMPORT_DIR = os.path.join(REPO_ROOT, 'ukrainian-calendar-app', 'database')
+FINAL_CSV = 'ukrainian_pagan_calendar_FINAL.csv'
+
+BASELINE_FILE = os.path.join(REPO_ROOT, 'benchmark_baseline.json')
+BASELINE_FORMAT_VERSION = 1
+
+SCALES = (1, 10, 100)
+
+# Етап повільніший за базовий більш ніж у стільки разів - регресія
+DEFAULT_TOLERANCE = 1.25
+
+
+def build_scaled_epub(source_path, target_path, scale):
+    """Копія EPUB, у якій кожен розділ зі spine повторено scale разів
+
+    Копії розділів отримують нові імена файлів і додаються в manifest та
+    в кінець spine, тож книга читається scale разів поспіль. Повертає
+    кількість розділів у новій книзі.
+    """
+    with zipfile.ZipFile(source_path) as src:
+        container = ET.fromstring(src.read('META-INF/container.xml'))
+        opf_path = container.find('c:rootfiles/c:rootfile', CONTAINER_NS).get('full-path')
+        opf_dir = posixpath.dirname(opf_path)
+        opf_bytes = src.read(opf_path)
+
+        # Зберігаємо префікси просторів імен OPF при записі
+        for _, (prefix, uri) in ET.iterparse(io.BytesIO(opf_bytes), events=('start-ns',)):
+            ET.register_namespace(prefix, uri)
+
+        package = ET.fromstring(opf_bytes)
+        manifest = package.find('opf:manifest', OPF_NS)
+        spine = package.find('opf:spine', OPF_NS)
+        items = {item.get('id'): item for item in manifest.findall('opf:item', OPF_NS)}
+        itemrefs = [ref for ref in spine.findall('opf:itemref', OPF_NS)
+                    if ref.get('idref') in items]
+
+        copies = []
+        for copy in range(1, scale):
+            for itemref in itemrefs:
+                item = items[itemref.get('idref')]
+                root, ext = posixpath.splitext(item.get('href'))
+                copy_id = f"{item.get('id')}_x{copy}"
+                copy_href = f"{root}_x{copy}{ext}"
+                manifest.append(ET.Element(item.tag, {**item.attrib, 'id': copy_id, 'href': copy_href}))
+                spine.append(ET.Element(itemref.tag, {**itemref.attrib, 'idref': copy_id}))
+                copies.append((
+                    posixpath.normpath(posixpath.join(opf_dir, unquote(item.get('href')))),
+                    posixpath.normpath(posixpath.join(opf_dir, unquote(copy_href))),
+                ))
+
+        scaled_opf = ET.tostring(package, encoding='utf-8', xml_declaration=True)
+
+        with zipfile.ZipFile(target_path, 'w') as dst:
+            # mimetype лишається першим і без стиснення, як у вихідному файлі
+            for info in src.infolist():
+                data = scaled_opf if info.filename == opf_path else src.read(info)
+                # Новий ZipInfo: writestr змінює зміщення в переданому об'єкті,
+                # і src далі читав би не з того місця
+                entry = zipfile.ZipInfo(info.filename, info.date_time)
+                entry.compress_type = info.compress_type
+                dst.writestr(entry, data)
+            for original, copy_name in copies:
+                dst.writestr(copy_name, src.read(original), compress_type=zipfile.ZIP_DEFLATED)
+
+    return len(itemrefs) * scale
+
+
+def write_calendar_variants(source_csv, workdir, count):
+    """count варіантів календаря для імпорту; варіант 0 - сам FINAL CSV
+
+    Решта відрізняються описом, тож злиття справді вирішує конфлікти за
+    пріоритетом, а не пропускає однакові рядки.
+    """
+    with open(source_csv, 'r', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        fieldnames = reader.fieldnames
+        rows = list(reader)
+
+    paths = []
+    for variant in range(count):
+        path = os.path.join(workdir, f'calendar_variant_{variant:03d}.csv')
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer.writeheader()
+            for row in rows:
+                if variant:
+                    row = {**row, CSV_FIELDS[1]: f"{row[CSV_FIELDS[1]]} [варіант {variant}]"}
+                writer.writerow(row)
+        paths.append(path)
+    return paths
+
+
+def run_stage(name, args, cwd, log_path, env=None):
+    """Запускає етап окремим процесом і повертає час виконання в секундах"""
+    with open(log_path, 'a', encoding='utf-8') as log:
+        log.write(f"\n=== {name}: {' '.join(args)}\n")
+        log.flush()
+        start = time.perf_counter()
+        result = subprocess.run(args, cwd=cwd, env=env, stdout=log, stderr=subprocess.STDOUT)
+        elapsed = time.perf_counter() - start
+
+    if result.returncode != 0:
+        raise RuntimeError(f"етап {name} завершився з кодом {result.returncode}, див. {log_path}")
+    return elapsed
+
+
+def time_stage(name, args, cwd, log_path, repeat, env=None, before=None):
+    """Найкращий час з repeat запусків (найменш зашумлений)"""
+    times = []
+    for _ in range(repeat):
+        if before:
+            before()
+        times.append(run_stage(name, args, cwd, log_path, env))
+    return {'seconds': round(min(times), 4), 'runs': [round(t, 4) for t in times]}
+
+
+def remove_files(*paths):
+    def remove():
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
+    return remove
+
+
+def bench_database_config():
+    """Параметри тимчасової БД або None, якщо PostgreSQL недоступний"""
+    try:
+        import psycopg2
+    except ImportError:
+        print("⚠ psycopg2 не встановлено - етапи імпорту пропущено")
+        return None
+
+    sys.path.insert(0, IMPORT_DIR)
+    from import_csv import DB_CONFIG
+
+    config = {**DB_CONFIG, 'database': f"calendar_bench_{os.getpid()}"}
+    try:
+        conn = psycopg2.connect(**{**config, 'database': 'postgres'})
+        conn.close()
+    except Exception as e:
+        print(f"⚠ PostgreSQL недоступний ({e.__class__.__name__}) - етапи імпорту пропущено")
+        return None
+    return config
+
+
+def drop_bench_database(config):
+    import psycopg2
+
+    try:
+        conn = psycopg2.connect(**{**config, 'database': 'postgres'})
+        conn.autocommit = True
+        cursor = conn.cursor()
+        cursor.execute(f"DROP DATABASE IF EXISTS {config['database']}")
+        cursor.close()
+        conn.close()
+    except Exception as e:
+        print(f"⚠ Не вдалося видалити тимчасову БД {config['database']}: {e}")
+
+
+def bench_scale(scale, workdir, args, db_config):
+    """Усі етапи конвеєра для одного масштабу корпусу"""
+    scale_dir = os.path.join(workdir, f'{scale}x')
+    os.makedirs(scale_dir)
+    log_path = os.path.join(scale_dir, 'bench.log')
+    python = sys.executable
+
+    epub_path = os.path.join(scale_dir, EPUB_FILE)
+    chapters = build_scaled_epub(os.path.join(REPO_ROOT, EPUB_FILE), epub_path, scale)
+    shutil.copy(os.path.join(REPO_ROOT, SOURCE_CSV), scale_dir)
+
+    results = {
+        'corpus': {'chapters': chapters, 'epub_bytes': os.path.getsize(epub_path)},
+        'stages': {},
+    }
+    stages = results['stages']
+    cache_dir = os.path.join(scale_dir, '.extract_cache')
+    extract = [python, os.path.join(REPO_ROOT, 'extract_dates_from_epub.py'),
+               '--workers', str(args.workers), '--cache-dir', cache_dir]
+
+    # Холодний запуск без кешу, потім повторний - усі розділи з кешу
+    stages['extract'] = time_stage(
+        'extract', extract, scale_dir, log_path, args.repeat,
+        before=lambda: shutil.rmtree(cache_dir, ignore_errors=True)
+    )
+    stages['extract_cached'] = time_stage('extract_cached', extract, scale_dir, log_path, args.repeat)
+    results['corpus']['extracted_bytes'] = os.path.getsize(
+        os.path.join(scale_dir, 'extracted_events.json')
+    )
+
+    # Індекс днів видаляється, щоб кожен запуск розбирав CSV заново
+    day_index = remove_files(os.path.join(scale_dir, SOURCE_CSV + '.index.json'))
+    stages['generate'] = time_stage(
+        'generate', [python, os.path.join(REPO_ROOT, 'generate_full_calendar.py')],
+        scale_dir, log_path, args.repeat, before=day_index
+    )
+    stages['create_final'] = time_stage(
+        'create_final', [python, os.path.join(REPO_ROOT, 'create_final_calendar.py')],
+        scale_dir, log_path, args.repeat, before=day_index
+    )
+
+    if db_config is None:
+        return results
+
+    import_dir = os.path.join(scale_dir, 'database')
+    os.makedirs(import_dir)
+    variants = write_calendar_variants(os.path.join(REPO_ROOT, FINAL_CSV), scale_dir, scale)
+    results['corpus']['import_files'] = len(variants)
+
+    env = {**os.environ, 'DB_NAME': db_config['database']}
+    import_args = [python, os.path.join(IMPORT_DIR, 'import_csv.py'),
+                   '--workers', str(args.workers), *variants]
+    try:
+        # Перший імпорт у порожню БД, потім повторний - дельта без змін
+        stages['import'] = time_stage(
+            'import', import_args, import_dir, log_path, args.repeat, env=env,
+            before=lambda: drop_bench_database(db_config)
+        )
+        stages['import_delta'] = time_stage(
+            'import_delta', import_args, import_dir, log_path, args.repeat, env=env
+        )
+    finally:
+        drop_bench_database(db_config)
+
+    return results
+
+
+def load_baseline(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if baseline.get('version') != BASELINE_FORMAT_VERSION:
+        return None
+    return baseline
+
+
+def compare_with_baseline(report, baseline, tolerance):
+    """Друкує таблицю часу етапів і повертає список регресій"""
+    regressions = []
+    print(f"\n{'Масштаб':<9}{'Етап':<16}{'Час, с':>10}{'База, с':>10}{'Зміна':>9}")
+    for scale, results in report['scales'].items():
+        base_stages = (baseline or {}).get('scales', {}).get(scale, {}).get('stages', {})
+        for stage, timing in results['stages'].items():
+            seconds = timing['seconds']
+            base = base_stages.get(stage, {}).get('seconds')
+            if base:
+                ratio = seconds / base
+                mark = ' ⚠' if ratio > tolerance else ''
+                print(f"{scale:<9}{stage:<16}{seconds:>10.3f}{base:>10.3f}{ratio:>8.2f}x{mark}")
+                if ratio > tolerance:
+                    regressions.append((scale, stage, ratio))
+            else:
+                print(f"{scale:<9}{stage:<16}{seconds:>10.3f}{'-':>10}{'-':>9}")
+    return regressions
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Бенчмарк витягування, генерації та імпорту календаря'
+    )
+    parser.add_argument(
+        '--scales', default=','.join(map(str, SCALES)),
+        help='масштаби синтетичного корпусу через кому (за замовчуванням 1,10,100)'
+    )
+    parser.add_argument(
+        '--repeat', type=int, default=1,
+        help='скільки разів запускати кожен етап; береться найкращий час'
+    )
+    parser.add_argument(
+        '--workers', type=int, default=1,
+        help='--workers для extract_dates_from_epub.py та import_csv.py'
+    )
+    parser.add_argument(
+        '--baseline', default=BASELINE_FILE,
+        help=f'файл базових результатів (за замовчуванням {os.path.basename(BASELINE_FILE)})'
+    )
+    parser.add_argument(
+        '--update-baseline', action='store_true',
+        help='зберегти результати цього запуску як базові'
+    )
+    parser.add_argument(
+        '--tolerance', type=float, default=DEFAULT_TOLERANCE,
+        help=f'допустиме сповільнення відносно бази (за замовчуванням {DEFAULT_TOLERANCE})'
+    )
+    parser.add_argument(
+        '--no-import', action='store_true',
+        help='не запускати етапи імпорту в PostgreSQL'
+    )
+    parser.add_argument(
+        '--keep-workdir', action='store_true',
+        help='не видаляти тимчасовий каталог з корпусами та логами'
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    scales = [int(scale) for scale in args.scales.split(',') if scale.strip()]
+
+    db_config = None if args.no_import else bench_database_config()
+
+    report = {
+        'version': BASELINE_FORMAT_VERSION,
+        'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'machine': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'workers': args.workers,
+        'scales': {},
+    }
+
+    workdir = tempfile.mkdtemp(prefix='calendar_bench_')
+    try:
+        for scale in scales:
+            print(f"▶ Масштаб {scale}x...")
+            report['scales'][f'{scale}x'] = bench_scale(scale, workdir, args, db_config)
+    except RuntimeError as e:
+        print(f"✗ Помилка бенчмарку: {e}")
+        args.keep_workdir = True
+        return 1
+    finally:
+        if args.keep_workdir:
+            print(f"Тимчасовий каталог: {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    baseline = load_baseline(args.baseline)
+    regressions = compare_with_baseline(report, baseline, args.tolerance)
+
+    if args.update_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+            f.write('\n')
+        print(f"\n✓ Базові результати збережено у {args.baseline}")
+    elif baseline is None:
+        print("\nБазових результатів немає; збережіть їх з --update-baseline")
+    elif regressions:
+        print(f"\n⚠ Сповільнення понад {args.tolerance}x:")
+        for scale, stage, ratio in regressions:
+            print(f"  {scale} {stage}: {ratio:.2f}x")
+        return 1
+    else:
+        print(f"\n✓ Регресій відносно {args.baseline} немає")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
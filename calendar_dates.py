@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Дати календаря: дні року та зв'язок старого (юліанського) і нового
+(григоріанського) стилю
+
+Таблиці рахуються один раз на рік і запам'ятовуються, тож календар на
+будь-який проміжок років не перебудовує дати для кожного дня окремо.
+"""
+
+import argparse
+import datetime
+import functools
+from collections import namedtuple
+
+DAYS_IN_MONTH = (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+# Різниця між ординалом date.toordinal() і юліанським номером дня (JDN)
+_JDN_OFFSET = 1721425
+
+# Роки, за якими перевіряється пара "старий / новий стиль": різниця між
+# календарями становила 11 днів у XVIII ст., 12 - у XIX, 13 - у XX-XXI.
+# Юліанський високосний рік з кожної пари дає власний 29 лютого.
+REFERENCE_YEARS = (1751, 1752, 1851, 1852, 1951, 1952)
+
+# Дати однієї події: "ДД.ММ" за старим і за новим стилем; old_style - None,
+# якщо в тексті дата лише одна
+DualDate = namedtuple('DualDate', ['old_style', 'new_style'])
+
+
+def is_leap_year(year):
+    """Високосний рік за григоріанським календарем"""
+    return year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)
+
+
+def is_julian_leap_year(year):
+    return year % 4 == 0
+
+
+@functools.lru_cache(maxsize=None)
+def dates_for_year(year):
+    """Усі дати року у форматі ДД.ММ (365 або 366, з 29.02 у високосні роки)"""
+    return tuple(
+        f"{day:02d}.{month:02d}"
+        for month, days in enumerate(DAYS_IN_MONTH, 1)
+        for day in range(1, days + (month == 2 and is_leap_year(year)) + 1)
+    )
+
+
+def iter_calendar_dates(first_year, last_year):
+    """Пари (рік, ДД.ММ) для всіх днів з first_year по last_year включно"""
+    for year in range(first_year, last_year + 1):
+        for date_str in dates_for_year(year):
+            yield year, date_str
+
+
+def parse_year_range(value):
+    """'2024-2035' або '2024' -> (перший рік, останній рік)
+
+    Тип аргументу argparse для опцій на кшталт --years.
+    """
+    first, _, last = value.partition('-')
+    try:
+        first_year = int(first)
+        last_year = int(last) if last else first_year
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"очікується РРРР або РРРР-РРРР: {value}")
+    if last_year < first_year:
+        raise argparse.ArgumentTypeError(f"останній рік менший за перший: {value}")
+    return first_year, last_year
+
+
+def julian_day_number(day, month, year):
+    """Юліанський номер дня для дати за юліанським календарем"""
+    a = (14 - month) // 12
+    y = year + 4800 - a
+    m = month + 12 * a - 3
+    return day + (153 * m + 2) // 5 + 365 * y + y // 4 - 32083
+
+
+def julian_ordinal(day, month, year):
+    """Ординал (як у date.toordinal()) дати за юліанським календарем"""
+    return julian_day_number(day, month, year) - _JDN_OFFSET
+
+
+@functools.lru_cache(maxsize=None)
+def julian_year_table(year):
+    """Григоріанські дати для кожного дня юліанського року
+
+    Індекс - номер дня в юліанському році (з 0), значення - datetime.date.
+    Таблиця будується один раз на рік: дні року йдуть підряд, тож
+    достатньо одного перетворення на початку року.
+    """
+    start = julian_ordinal(1, 1, year)
+    days = 366 if is_julian_leap_year(year) else 365
+    return tuple(datetime.date.fromordinal(start + i) for i in range(days))
+
+
+def julian_day_of_year(day, month, year):
+    """Номер дня (з 0) у юліанському році або None для неіснуючої дати"""
+    if not 1 <= month <= 12:
+        return None
+    days_in_month = DAYS_IN_MONTH[month - 1] + (month == 2 and is_julian_leap_year(year))
+    if not 1 <= day <= days_in_month:
+        return None
+    return (sum(DAYS_IN_MONTH[:month - 1])
+            + (month > 2 and is_julian_leap_year(year))
+            + day - 1)
+
+
+def julian_to_gregorian(day, month, year):
+    """Дата за старим стилем -> datetime.date за новим (або None)"""
+    index = julian_day_of_year(day, month, year)
+    if index is None:
+        return None
+    return julian_year_table(year)[index]
+
+
+def link_dual_date(old_day, old_month, new_day, new_month):
+    """Чи є друга дата перекладом першої зі старого стилю на новий
+
+    Перевіряється різниця календарів у 11, 12 і 13 днів (XVIII-XXI ст.).
+    """
+    for year in REFERENCE_YEARS:
+        converted = julian_to_gregorian(old_day, old_month, year)
+        if converted is not None and (converted.day, converted.month) == (new_day, new_month):
+            return True
+    return False
+
+
+def resolve_dual_date(dual_date, year):
+    """Дата події за новим стилем у конкретному році
+
+    Для пари береться стара дата й перераховується через таблицю року, тож
+    зміщення 14 днів після 2100 року враховується автоматично. Подія
+    зі старого стилю наприкінці року може припасти на наступний рік, тому
+    повертається datetime.date або None. Дата без старого стилю береться
+    як є.
+    """
+    if dual_date.old_style is not None:
+        day, month = (int(part) for part in dual_date.old_style.split('.'))
+        return julian_to_gregorian(day, month, year)
+
+    day, month = (int(part) for part in dual_date.new_style.split('.'))
+    try:
+        return datetime.date(year, month, day)
+    except ValueError:
+        return None
@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Повне оновлення календаря одним запуском: EPUB -> злиття з CSV -> PostgreSQL
+
+Етапи з'єднані генераторами й не пишуть проміжних файлів: події з
+extract_dates_from_epub одразу йдуть у злиття з джерелом CSV
+(generate_full_calendar), а рядки календаря - у COPY імпорту (import_csv).
+Як і import_csv.py, імпорт типово бере курований FINAL_CSV з найвищим
+пріоритетом, тож злитий календар лише доповнює дні, яких у ньому немає.
+
+Для кожного етапу рахується відбиток його входів:
+
+    extract  - EPUB і версія логіки витягування
+    merge    - відбиток extract, джерело CSV і параметри злиття
+    import   - відбиток merge, додаткові CSV, schema.sql, роки рухомих
+               свят, база даних і поточний вміст календаря в ній
+    output   - відбиток merge, файл --output і його поточний вміст
+
+Розклад нотифікацій на рік наперед оновлюється при кожному запуску з
+імпортом, навіть коли сам імпорт пропущено: його вікно залежить від дати.
+
+Відбиток кінцевого етапу включає стан його результату, тож видалений чи
+змінений вручну файл або база, куди після пайплайна імпортували інший CSV,
+дають новий відбиток. Кінцеві етапи (import, output), відбиток яких
+збігається з останнім успішним запуском, пропускаються, а extract і merge
+виконуються лише тоді, коли їхній результат комусь потрібен. Повторне
+витягування після зміни лише джерела CSV швидке завдяки кешу розділів
+extract_dates_from_epub.
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sys
+
+from calendar_source import SOURCE_CSV, load_day_index, source_record, write_json_atomic
+from extract_dates_from_epub import (
+    CACHE_DIR, EPUB_FILE, HTML_BACKENDS, ChapterCache, extraction_version,
+    iter_cached_chapter_results, iter_chapter_results, iter_epub_chapters, iter_events,
+)
+from generate_full_calendar import (
+    CALENDAR_FIELDS, MAX_DESCRIPTION_LENGTH, generate_all_dates, iter_calendar_rows,
+    pick_date_events,
+)
+from passage_store import DEDUP_THRESHOLD, PassageStore
+
+# Курований календар, який імпортує import_csv.py
+FINAL_CSV = 'ukrainian_pagan_calendar_FINAL.csv'
+
+IMPORT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ukrainian-calendar-app', 'database')
+
+# Відбитки останніх успішних запусків етапів
+STATE_FILE = '.pipeline_state.json'
+STATE_FORMAT_VERSION = 1
+
+# Збільшуйте при зміні логіки злиття, яку не видно в параметрах відбитка
+MERGE_VERSION = 2
+
+
+def file_digest(path):
+    """sha256 вмісту файлу (не часу зміни, тож checkout не скидає відбиток)"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def fingerprint(*parts):
+    data = json.dumps(parts, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()[:32]
+
+
+def load_state(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+    if state.get('version') != STATE_FORMAT_VERSION:
+        return {}
+    return state.get('stages', {})
+
+
+def save_state(path, stages):
+    write_json_atomic(path, {'version': STATE_FORMAT_VERSION, 'stages': stages}, indent=2)
+
+
+def optional_digest(path):
+    """sha256 файлу або None, якщо його немає"""
+    return file_digest(path) if os.path.exists(path) else None
+
+
+def database_state():
+    """Відбиток календаря в БД або None, якщо база недоступна"""
+    import psycopg2
+    from import_csv import DB_CONFIG, database_digest
+
+    try:
+        conn = psycopg2.connect(**DB_CONFIG)
+    except psycopg2.Error:
+        return None
+    try:
+        return database_digest(conn)
+    except psycopg2.Error:
+        # У базі ще немає таблиць - імпорт потрібен
+        return None
+    finally:
+        conn.close()
+
+
+def sink_fingerprint(name, merge, args):
+    """Відбиток кінцевого етапу разом зі станом його результату
+
+    Рахується до запуску і ще раз після успішного запуску, щоб у стан
+    потрапив уже записаний результат.
+    """
+    if name == 'output':
+        path = os.path.abspath(args.output)
+        return fingerprint('output', merge, path, optional_digest(path))
+
+    from import_csv import DB_CONFIG, FEAST_YEARS, SCHEMA_FILE
+    return fingerprint(
+        'import', merge,
+        [(path, file_digest(path)) for path in args.csv],
+        file_digest(SCHEMA_FILE), FEAST_YEARS,
+        DB_CONFIG['host'], DB_CONFIG['port'], DB_CONFIG['database'],
+        database_state(),
+    )
+
+
+def stage_fingerprints(args):
+    """Відбитки всіх етапів; рахуються до запуску будь-якого з них"""
+    stages = {}
+    stages['extract'] = fingerprint(
+        'extract', file_digest(EPUB_FILE), extraction_version(), args.dedup_threshold
+    )
+    stages['merge'] = fingerprint(
+        'merge', stages['extract'], optional_digest(SOURCE_CSV),
+        MERGE_VERSION, MAX_DESCRIPTION_LENGTH, generate_all_dates(),
+    )
+    if not args.no_import:
+        stages['import'] = sink_fingerprint('import', stages['merge'], args)
+    if args.output:
+        stages['output'] = sink_fingerprint('output', stages['merge'], args)
+    return stages
+
+
+def iter_book_events(args):
+    """Етап extract: пари (дата ДД.ММ, подія з context) у порядку розділів
+
+    Контекст проходить ту саму дедуплікацію уривків, що й у
+    extracted_events.json, тож злиття дає такий самий календар, як
+    generate_full_calendar.py після extract_dates_from_epub.py.
+    """
+    chapters = iter_epub_chapters(EPUB_FILE)
+    cache = None
+    if args.no_cache:
+        results = iter_chapter_results(chapters, args.workers, args.html_backend)
+    else:
+        cache = ChapterCache(args.cache_dir)
+        results = iter_cached_chapter_results(chapters, cache, args.workers, args.html_backend)
+
+    passages = PassageStore(args.dedup_threshold)
+    for normalized_date, event in iter_events(results):
+        passage_id, _ = passages.add(event.context, anchor=event.mention)
+        yield normalized_date, {
+            'event_name': event.event_name,
+            'context': passages.texts[passage_id],
+            'source_file': event.source_file,
+            'is_pagan': event.is_pagan,
+            'dual_date': dict(event.dual_date._asdict()) if event.dual_date else None,
+        }
+
+    print(f"✓ extract: {len(passages)} унікальних уривків")
+    if cache is not None:
+        removed = cache.prune()
+        print(f"✓ extract: {cache.hits} розділів з кешу, {cache.misses} оброблено заново, "
+              f"{removed} застарілих записів кешу видалено")
+
+
+def iter_merged_rows(events):
+    """Етап merge: рядки календаря (словники з CALENDAR_FIELDS) для кожної дати
+
+    Події потоку зводяться до однієї на дату, тож у пам'яті не лишається
+    контекст кожної згадки.
+    """
+    extracted = pick_date_events(events)
+    existing = load_day_index(SOURCE_CSV)
+
+    filled_count = total = 0
+    for row, filled in iter_calendar_rows(existing, extracted, generate_all_dates()):
+        total += 1
+        if filled:
+            filled_count += 1
+        yield row
+
+    print(f"✓ merge: {total} днів, заповнено {filled_count} "
+          f"({len(extracted)} дат з EPUB)")
+
+
+def write_output(rows, output_file):
+    """Етап output: календар у CSV (як ukrainian_pagan_calendar_full.csv)"""
+    with open(output_file, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=CALENDAR_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"✓ output: календар збережено у файл {output_file}")
+    return True
+
+
+def import_rows(rows, args):
+    """Етап import: дельта календаря в PostgreSQL, рухомі свята й розклад нотифікацій
+
+    CSV з --csv (типово FINAL_CSV) мають вищий пріоритет за злитий календар.
+    """
+    from import_csv import (
+        FEAST_YEARS, build_event_rows, connect_db, create_database_if_not_exists,
+        create_schema, import_event_rows, import_movable_feasts, iter_event_rows,
+    )
+    from schedule_notifications import print_schedule_summary, schedule_notifications
+
+    records = (record for record in map(source_record, rows) if record is not None)
+    sources = [(path, iter_event_rows(path)) for path in args.csv]
+    sources.append((f"{EPUB_FILE} + {SOURCE_CSV}", build_event_rows(records)))
+
+    create_database_if_not_exists()
+    workers = max(1, min(args.workers, len(sources)))
+    pool = connect_db(max_connections=workers + 1)
+    try:
+        conn = pool.getconn()
+        create_schema(conn)
+        pool.putconn(conn)
+
+        if not import_event_rows(pool, sources, workers):
+            return False
+
+        conn = pool.getconn()
+        try:
+            import_movable_feasts(conn, *FEAST_YEARS)
+            print_schedule_summary(*schedule_notifications(conn))
+        finally:
+            pool.putconn(conn)
+        return True
+    finally:
+        pool.closeall()
+
+
+def refresh_schedule():
+    """Зсуває вікно нотифікацій від сьогодні, коли сам імпорт пропущено"""
+    import psycopg2
+    from import_csv import DB_CONFIG
+    from schedule_notifications import print_schedule_summary, schedule_notifications
+
+    try:
+        conn = psycopg2.connect(**DB_CONFIG)
+    except psycopg2.Error as e:
+        print(f"✗ schedule: помилка підключення до БД: {e}")
+        return False
+    try:
+        print_schedule_summary(*schedule_notifications(conn))
+        return True
+    except psycopg2.Error as e:
+        print(f"✗ schedule: {e}")
+        return False
+    finally:
+        conn.close()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Повне оновлення календаря: EPUB -> злиття з CSV -> PostgreSQL'
+    )
+    parser.add_argument(
+        '--workers', type=int, default=4,
+        help='процеси для обробки розділів і з\'єднання для імпорту (типово: 4)'
+    )
+    parser.add_argument(
+        '--html-backend', choices=sorted(HTML_BACKENDS), default='bs4',
+        help='спосіб перетворення HTML у текст (типово: bs4)'
+    )
+    parser.add_argument(
+        '--cache-dir', default=CACHE_DIR,
+        help=f'директорія кешу оброблених розділів (типово: {CACHE_DIR})'
+    )
+    parser.add_argument(
+        '--no-cache', action='store_true',
+        help='обробити всі розділи заново, не читаючи і не оновлюючи кеш'
+    )
+    parser.add_argument(
+        '--dedup-threshold', type=float, default=DEDUP_THRESHOLD,
+        help='схожість (0..1), з якої уривки контексту вважаються однаковими '
+             f'(типово: {DEDUP_THRESHOLD})'
+    )
+    parser.add_argument(
+        '--csv', action='append', metavar='CSV',
+        help='CSV для імпорту з вищим пріоритетом за злитий календар (можна '
+             f'вказати кілька разів, перший - найвищий; типово: {FINAL_CSV})'
+    )
+    parser.add_argument(
+        '--no-csv', action='store_true',
+        help='імпортувати лише злитий календар, без CSV з --csv'
+    )
+    parser.add_argument(
+        '--output', metavar='FILE',
+        help='також записати злитий календар у CSV'
+    )
+    parser.add_argument(
+        '--no-import', action='store_true',
+        help='не імпортувати в PostgreSQL'
+    )
+    parser.add_argument(
+        '--force', action='store_true',
+        help='виконати етапи, навіть якщо відбитки не змінились'
+    )
+    parser.add_argument(
+        '--state', default=STATE_FILE,
+        help=f'файл з відбитками останніх запусків (типово: {STATE_FILE})'
+    )
+    args = parser.parse_args()
+
+    if args.no_csv:
+        args.csv = []
+    elif args.csv is None:
+        args.csv = [FINAL_CSV]
+    return args
+
+
+def main():
+    args = parse_args()
+
+    for path in [EPUB_FILE] + ([] if args.no_import else args.csv):
+        if not os.path.exists(path):
+            print(f"✗ Файл {path} не знайдено!")
+            sys.exit(1)
+
+    if not args.no_import:
+        sys.path.insert(0, IMPORT_DIR)
+
+    previous = load_state(args.state)
+    current = stage_fingerprints(args)
+
+    sinks = [name for name in ('output', 'import') if name in current]
+    if not sinks:
+        print("⚠ Немає кінцевих етапів: вкажіть --output або приберіть --no-import")
+        return
+
+    pending = [name for name in sinks if args.force or previous.get(name) != current[name]]
+    for name in sinks:
+        if name not in pending:
+            print(f"- {name}: пропущено, відбиток без змін")
+
+    # Вікно нотифікацій залежить від сьогоднішньої дати, а не від відбитків,
+    # тож без імпорту воно оновлюється окремо при кожному запуску
+    ok = True
+    if 'import' in sinks and 'import' not in pending:
+        ok = refresh_schedule()
+
+    if not pending:
+        print("\n✅ Календар актуальний" if ok else "\n⚠ Завершено з помилками")
+        if not ok:
+            sys.exit(1)
+        return
+
+    print(f"Етапи: extract -> merge -> {', '.join(pending)}\n")
+
+    # Злитий календар - 366 рядків, тож для двох кінцевих етапів його
+    # дешевше зібрати один раз, ніж двічі проходити книгу
+    rows = iter_merged_rows(iter_book_events(args))
+    if len(pending) > 1:
+        rows = list(rows)
+
+    completed = dict(previous)
+    stage_runners = {
+        'output': lambda: write_output(rows, args.output),
+        'import': lambda: import_rows(rows, args),
+    }
+    for name in pending:
+        if stage_runners[name]():
+            completed.update(extract=current['extract'], merge=current['merge'])
+            completed[name] = sink_fingerprint(name, current['merge'], args)
+        else:
+            print(f"✗ {name}: етап не завершено")
+            ok = False
+
+    save_state(args.state, completed)
+
+    print()
+    print("✅ Готово!" if ok else "⚠ Завершено з помилками")
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Спільний індекс джерела календаря: CSV розбирається один раз у 366 слотів за днем року
+"""
+
+import csv
+import functools
+import json
+import os
+
+SOURCE_CSV = 'podii_z_tradytsiiamy_refined (2).csv'
+
+# Колонки CSV і ключі запису в індексі
+CSV_FIELDS = ('Подія', 'Опис', 'Традиції', 'Як підготуватися')
+RECORD_KEYS = ('event', 'description', 'traditions', 'preparation')
+
+# Серіалізований індекс лежить поруч із CSV: "<ім'я>.csv.index.json"
+INDEX_SUFFIX = '.index.json'
+INDEX_FORMAT_VERSION = 1
+
+# Дні рахуються за високосним роком, тож 29 лютого має власний слот
+LEAP_DAYS_IN_MONTH = (31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+DAYS_IN_YEAR = sum(LEAP_DAYS_IN_MONTH)
+MONTH_OFFSETS = tuple(sum(LEAP_DAYS_IN_MONTH[:i]) for i in range(12))
+
+# Дата ДД.ММ для кожного слоту
+SLOT_DATES = tuple(
+    f"{day:02d}.{month:02d}"
+    for month, days in enumerate(LEAP_DAYS_IN_MONTH, 1)
+    for day in range(1, days + 1)
+)
+SLOT_BY_DATE = {date: slot for slot, date in enumerate(SLOT_DATES)}
+
+
+def day_of_year(day, month):
+    """Повертає номер слоту (0..365) для дня і місяця або None для неіснуючої дати"""
+    if not 1 <= month <= 12 or not 1 <= day <= LEAP_DAYS_IN_MONTH[month - 1]:
+        return None
+    return MONTH_OFFSETS[month - 1] + day - 1
+
+
+def normalize_source_date(value):
+    """Розбирає дату з CSV ("1.11", "\"13.12\"") у пару (день, місяць)
+
+    Дати в інших форматах ("1 тра", "55 ВЕР") та неіснуючі дати відкидаються.
+    """
+    parts = value.strip().strip('"').split('.')
+    if len(parts) != 2:
+        return None
+
+    day, month = (part.strip().strip('"') for part in parts)
+    if not (day.isdigit() and month.isdigit()):
+        return None
+
+    day, month = int(day), int(month)
+    if day_of_year(day, month) is None:
+        return None
+    return day, month
+
+
+class DayIndex:
+    """Записи календаря в масиві з 366 слотів
+
+    Слот - кортеж полів (подія, опис, традиції, як підготуватися) або None,
+    якщо рядка для цього дня в джерелі немає. Доступ за датою "ДД.ММ".
+    """
+
+    __slots__ = ('slots',)
+
+    def __init__(self, slots=None):
+        self.slots = slots if slots is not None else [None] * DAYS_IN_YEAR
+
+    def __len__(self):
+        return sum(1 for fields in self.slots if fields is not None)
+
+    def __contains__(self, date_str):
+        slot = SLOT_BY_DATE.get(date_str)
+        return slot is not None and self.slots[slot] is not None
+
+    def __getitem__(self, date_str):
+        record = self.get(date_str)
+        if record is None:
+            raise KeyError(date_str)
+        return record
+
+    def get(self, date_str, default=None):
+        slot = SLOT_BY_DATE.get(date_str)
+        if slot is None or self.slots[slot] is None:
+            return default
+        return dict(zip(RECORD_KEYS, self.slots[slot]))
+
+    def items(self):
+        """Пари (ДД.ММ, запис) у календарному порядку"""
+        for slot, fields in enumerate(self.slots):
+            if fields is not None:
+                yield SLOT_DATES[slot], dict(zip(RECORD_KEYS, fields))
+
+    def iter_days(self):
+        """Трійки (день, місяць, запис) у календарному порядку"""
+        for date_str, record in self.items():
+            day, month = date_str.split('.')
+            yield int(day), int(month), record
+
+
+def iter_source_rows(csv_path):
+    """Потоково читає CSV і повертає трійки (день, місяць, поля) у порядку файлу
+
+    Рядки з некоректними датами пропускаються; повтори дат не згортаються.
+    """
+    with open(csv_path, 'r', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            record = source_record(row)
+            if record is not None:
+                yield record
+
+
+def source_record(row):
+    """Рядок календаря (словник з колонками CSV) -> (день, місяць, поля) або None"""
+    date = normalize_source_date(row.get('Дата') or '')
+    if not date:
+        return None
+
+    fields = tuple(
+        (row.get(field) or '').strip().strip('"') for field in CSV_FIELDS
+    )
+    return date[0], date[1], fields
+
+
+def parse_source_csv(csv_path):
+    """Розбирає CSV у DayIndex; для повторюваних дат перемагає останній рядок"""
+    index = DayIndex()
+
+    for day, month, fields in iter_source_rows(csv_path):
+        index.slots[day_of_year(day, month)] = fields
+
+    return index
+
+
+def source_stamp(path):
+    """Розмір і час зміни файлу: за ними кеші визначають, чи змінилося джерело"""
+    stat = os.stat(path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def write_file_atomic(path, data):
+    """Записує байти через тимчасовий файл, щоб читач не побачив файл наполовину"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def write_json_atomic(path, data, **options):
+    """write_file_atomic для JSON; options передаються в json.dumps"""
+    write_file_atomic(path, json.dumps(data, ensure_ascii=False, **options).encode('utf-8'))
+
+
+def write_cache_json(path, data):
+    """write_json_atomic для кешів, що лише прискорюють роботу
+
+    Каталог без права запису не помилка: кеш просто не зберігається.
+    Повертає True, якщо файл записано.
+    """
+    try:
+        write_json_atomic(path, data)
+        return True
+    except OSError as e:
+        print(f"⚠ Не вдалося зберегти {path}: {e}")
+        return False
+
+
+def _read_serialized_index(index_path, stamp):
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if data.get('version') != INDEX_FORMAT_VERSION or data.get('source') != stamp:
+        return None
+
+    slots = [tuple(fields) if fields is not None else None for fields in data['slots']]
+    if len(slots) != DAYS_IN_YEAR:
+        return None
+    return DayIndex(slots)
+
+
+def _write_serialized_index(index_path, stamp, index):
+    data = {
+        'version': INDEX_FORMAT_VERSION,
+        'source': stamp,
+        'slots': index.slots,
+    }
+    write_cache_json(index_path, data)
+
+
+@functools.lru_cache(maxsize=None)
+def load_day_index(csv_path=SOURCE_CSV):
+    """Повертає DayIndex для CSV, розбираючи файл не більше одного разу
+
+    Результат запам'ятовується в процесі та зберігається поруч із CSV; поки
+    розмір і час зміни CSV ті самі, наступні запуски читають готовий індекс.
+    """
+    try:
+        stamp = source_stamp(csv_path)
+    except OSError as e:
+        print(f"Помилка читання CSV: {e}")
+        return DayIndex()
+
+    index_path = csv_path + INDEX_SUFFIX
+    index = _read_serialized_index(index_path, stamp)
+    if index is not None:
+        return index
+
+    try:
+        index = parse_source_csv(csv_path)
+    except Exception as e:
+        print(f"Помилка читання CSV: {e}")
+        return DayIndex()
+
+    _write_serialized_index(index_path, stamp, index)
+    return index
@@ -1,51 +1,31 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """
-Створення фінального CSV календаря на 365 днів
+Створення фінального CSV календаря на 365 днів або на кілька років поспіль
 """
 
+import argparse
 import csv
-from datetime import datetime, timedelta
+import datetime
+import sys
+
+from calendar_dates import (
+    DualDate, dates_for_year, iter_calendar_dates, parse_year_range, resolve_dual_date,
+)
+from calendar_source import SOURCE_CSV, load_day_index
+from generate_full_calendar import load_dual_dates
+
+FIELDNAMES = ['Дата', 'Подія', 'Опис', 'Традиції', 'Як підготуватися']
 
 
 def load_quality_data():
-    """Завантажує якісні дані з існуючого CSV"""
+    """Завантажує якісні дані з існуючого CSV через спільний індекс днів"""
     quality_data = {}
 
-    try:
-        with open('podii_z_tradytsiiamy_refined (2).csv', 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                date = row['Дата'].strip().strip('"')
-
-                # Пропускаємо некоректні записи
-                if not date or date in [';;;;', ''] or '.' not in date:
-                    continue
-
-                try:
-                    parts = date.split('.')
-                    if len(parts) == 2:
-                        day = parts[0].strip().zfill(2)
-                        month = parts[1].strip().zfill(2)
-                        normalized_date = f"{day}.{month}"
-
-                        event = row.get('Подія', '').strip().strip('"')
-                        desc = row.get('Опис', '').strip().strip('"')
-                        trad = row.get('Традиції', '').strip().strip('"')
-                        prep = row.get('Як підготуватися', '').strip().strip('"')
-
-                        # Зберігаємо тільки якщо є хоч щось змістовне
-                        if event or (desc and len(desc) > 50):
-                            quality_data[normalized_date] = {
-                                'event': event,
-                                'description': desc,
-                                'traditions': trad,
-                                'preparation': prep
-                            }
-                except:
-                    continue
-    except Exception as e:
-        print(f"Помилка читання CSV: {e}")
+    for date, record in load_day_index(SOURCE_CSV).items():
+        # Зберігаємо тільки якщо є хоч щось змістовне
+        if record['event'] or len(record['description']) > 50:
+            quality_data[date] = record
 
     print(f"✓ Завантажено {len(quality_data)} якісних записів")
     return quality_data
@@ -53,15 +33,16 @@ def load_quality_data():
 
 def generate_365_days():
     """Генерує список з 365 днів (без 29 лютого)"""
-    dates = []
-    start_date = datetime(2023, 1, 1)  # 2023 - не високосний
+    return list(dates_for_year(2023))  # 2023 - не високосний
 
-    for i in range(365):
-        current_date = start_date + timedelta(days=i)
-        date_str = current_date.strftime("%d.%m")
-        dates.append(date_str)
 
-    return dates
+def fill_row(row, data):
+    """Заповнює рядок календаря записом з quality_data (або порожніми полями)"""
+    row['Подія'] = data['event'] if data else ''
+    row['Опис'] = data['description'] if data else ''
+    row['Традиції'] = data['traditions'] if data else ''
+    row['Як підготуватися'] = data['preparation'] if data else ''
+    return row
 
 
 def create_final_csv():
@@ -72,29 +53,16 @@ def create_final_csv():
     output_file = 'ukrainian_calendar_365_days.csv'
 
     with open(output_file, 'w', encoding='utf-8', newline='') as f:
-        fieldnames = ['Дата', 'Подія', 'Опис', 'Традиції', 'Як підготуватися']
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
         writer.writeheader()
 
         filled_count = 0
 
         for date_str in all_dates:
-            row = {'Дата': date_str}
-
-            if date_str in quality_data:
-                data = quality_data[date_str]
-                row['Подія'] = data['event']
-                row['Опис'] = data['description']
-                row['Традиції'] = data['traditions']
-                row['Як підготуватися'] = data['preparation']
+            data = quality_data.get(date_str)
+            if data:
                 filled_count += 1
-            else:
-                row['Подія'] = ''
-                row['Опис'] = ''
-                row['Традиції'] = ''
-                row['Як підготуватися'] = ''
-
-            writer.writerow(row)
+            writer.writerow(fill_row({'Дата': date_str}, data))
 
     print(f"\n✓ Створено файл {output_file}")
     print(f"✓ Всього днів: {len(all_dates)}")
@@ -110,7 +78,94 @@ def create_final_csv():
                 print(f"  {date}: {event}")
 
 
+def resolve_year_records(quality_data, dual_dates, first_year, last_year):
+    """Розкладає записи по конкретних днях років first_year..last_year
+
+    Свято, яке книга дає парою "старий / новий стиль" (dual_dates), іде за
+    старою датою й перераховується через юліанську таблицю кожного року,
+    тож після 2100 року воно зсувається на день пізніше. Решта записів
+    стоять на тих самих ДД.ММ щороку. Повертає {datetime.date: запис} і
+    кількість записів, що не помістились, бо їхній день уже зайнятий.
+    """
+    first_day = datetime.date(first_year, 1, 1)
+    last_day = datetime.date(last_year, 12, 31)
+
+    # Пари йдуть першими: саме вони зсуваються на дні інших записів
+    ordered = sorted(quality_data.items(), key=lambda item: item[0] not in dual_dates)
+
+    resolved = {}
+    collisions = 0
+    # Свято за старим стилем з кінця грудня припадає на січень наступного
+    # року, тож починаємо з попереднього
+    for year in range(first_year - 1, last_year + 1):
+        for date_str, record in ordered:
+            dual = dual_dates.get(date_str, DualDate(None, date_str))
+            day = resolve_dual_date(dual, year)
+            if day is None or not first_day <= day <= last_day:
+                continue
+            if day in resolved:
+                collisions += 1
+                continue
+            resolved[day] = record
+    return resolved, collisions
+
+
+def create_multi_year_csv(first_year, last_year):
+    """Створює CSV календар на роки first_year..last_year з датами ДД.ММ.РРРР
+
+    Дати кожного року беруться з кешованої таблиці, тож 29 лютого є лише у
+    високосних роках. Записи джерела повторюються щороку, а свята з парою
+    старий/новий стиль розкладаються за старою датою (resolve_year_records).
+    """
+    dual_dates = load_dual_dates()
+    if not dual_dates:
+        # Без пар свята за старим стилем стояли б на сталих ДД.ММ
+        print("✗ У витягнутих подіях немає пар старий/новий стиль (dual_date): "
+              "перегенеруйте їх через extract_dates_from_epub.py")
+        sys.exit(1)
+
+    quality_data = load_quality_data()
+    records, collisions = resolve_year_records(quality_data, dual_dates, first_year, last_year)
+    output_file = f'ukrainian_calendar_{first_year}-{last_year}.csv'
+
+    total_days = filled_count = 0
+    with open(output_file, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
+        writer.writeheader()
+
+        for year, date_str in iter_calendar_dates(first_year, last_year):
+            day, month = (int(part) for part in date_str.split('.'))
+            data = records.get(datetime.date(year, month, day))
+            total_days += 1
+            if data:
+                filled_count += 1
+            writer.writerow(fill_row({'Дата': f"{date_str}.{year}"}, data))
+
+    linked = sum(1 for date_str in quality_data if date_str in dual_dates)
+    print(f"\n✓ Створено файл {output_file}")
+    print(f"✓ Років: {last_year - first_year + 1}, днів: {total_days}")
+    print(f"✓ Заповнено якісними даними: {filled_count}")
+    print(f"✓ Свят, що йдуть за старим стилем: {linked}")
+    if collisions:
+        print(f"⚠ Не поміщено через зайнятий день: {collisions}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Створення фінального CSV календаря')
+    parser.add_argument(
+        '--years', type=parse_year_range, metavar='РРРР-РРРР',
+        help='календар на кілька років поспіль (наприклад, 2025-2035) '
+             'замість одного року на 365 днів'
+    )
+    return parser.parse_args()
+
+
 if __name__ == '__main__':
-    print("Створення фінального календаря на 365 днів...\n")
-    create_final_csv()
+    args = parse_args()
+    if args.years:
+        print(f"Створення календаря на {args.years[0]}-{args.years[1]} роки...\n")
+        create_multi_year_csv(*args.years)
+    else:
+        print("Створення фінального календаря на 365 днів...\n")
+        create_final_csv()
     print("\n✅ Готово!")
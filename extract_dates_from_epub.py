@@ -6,10 +6,52 @@
 
 import re
 import os
+import argparse
+import bisect
+import cProfile
+import functools
+import hashlib
+import posixpath
+import sys
+import time
+import zipfile
+import xml.etree.ElementTree as ET
+from urllib.parse import unquote
+from html.parser import HTMLParser
 from bs4 import BeautifulSoup
-from collections import defaultdict
+from collections import defaultdict, namedtuple
+from concurrent.futures import ProcessPoolExecutor
 import json
 
+from calendar_dates import DualDate, link_dual_date
+from calendar_source import write_json_atomic
+from passage_store import DEDUP_THRESHOLD, PassageStore
+
+EPUB_FILE = 'mifolohiia.epub'
+
+# Вихідні файли для форматів --format
+OUTPUT_FILES = {
+    'json': 'extracted_events.json',
+    'jsonl': 'extracted_events.jsonl',
+}
+
+# Кеш оброблених розділів між запусками
+CACHE_DIR = '.extract_cache'
+
+# Звіт --metrics: час етапів і лічильники для кожного розділу
+METRICS_FILE = 'extract_metrics.json'
+METRIC_STAGES = ('html_parse', 'date_scan', 'context_build', 'classify')
+
+# Збільшуйте при зміні логіки обробки розділу, яку не видно в константах нижче
+CACHE_FORMAT_VERSION = 7
+
+# Простори імен OPF-пакета та контейнера EPUB
+CONTAINER_NS = {'c': 'urn:oasis:names:tc:opendocument:xmlns:container'}
+OPF_NS = {'opf': 'http://www.idpf.org/2007/opf'}
+
+# Типи документів, які вважаємо розділами книги
+CHAPTER_MEDIA_TYPES = ('application/xhtml+xml', 'text/html')
+
 # Мапінг українських місяців
 MONTHS_MAP = {
     'січня': '01', 'січ': '01',
@@ -26,6 +68,76 @@ MONTHS_MAP = {
     'грудня': '12', 'гру': '12',
 }
 
+# Один скомпільований патерн для всіх форм дат: "30 листопада", "17 / 30 січня",
+# "30 листопада / 13 грудня", "30 лис". Повні назви стоять перед скороченнями,
+# щоб одна згадка давала рівно один збіг.
+_FULL_MONTHS = '|'.join(name for name in MONTHS_MAP if len(name) > 3)
+_SHORT_MONTHS = '|'.join(name for name in MONTHS_MAP if len(name) == 3)
+_MONTH = rf'(?:{_FULL_MONTHS})|(?:{_SHORT_MONTHS})\b'
+_DATE = (
+    r'(?P<day>\d{1,2})(?:\s*/\s*(?P<new_day>\d{1,2}))?\s+'
+    rf'(?P<month>{_MONTH})'
+    rf'(?(new_day)|(?:\s*/\s*(?P<paired_day>\d{{1,2}})\s+(?P<paired_month>{_MONTH}))?)'
+)
+DATE_PATTERN = re.compile(_DATE, re.IGNORECASE)
+
+# Кінець речення: розділовий знак, пробіли і велика літера чи цифра далі.
+# Крапки після одно- та дволітерних скорочень ("с.", "св.", "т.") не рахуються.
+_SENTENCE_END = (
+    r'(?<![\s.][^\W\d_])(?<![\s.][^\W\d_]{2})'
+    r'[.!?…]+["»”)]*\s+(?=[«"„(]?[А-ЯЇІЄҐA-Z\d])'
+)
+
+# Дати і межі речень шукаються одним проходом по тексту
+SCAN_PATTERN = re.compile(rf'(?i:{_DATE})|(?P<sentence_end>{_SENTENCE_END})')
+
+# Знайдена згадка дати. Для пар "17 / 30 січня" і "30 листопада / 13 грудня"
+# day і month - перша дата (старий стиль), new_style_day і new_style_month -
+# друга; для звичайних дат обидва None.
+DateMatch = namedtuple(
+    'DateMatch',
+    ['text', 'start', 'end', 'day', 'month', 'new_style_day', 'new_style_month']
+)
+
+# Межі вікна контексту навколо згадки дати
+CONTEXT_BEFORE = 300
+CONTEXT_AFTER = 800
+
+# Наскільки далеко межа вікна може зсунутися до межі речення; якщо найближча
+# межа речення далі, вікно обрізається по межі слова
+MAX_SENTENCE_SNAP = 200
+WHITESPACE = re.compile(r'\s+')
+
+# Розмітка статей словника для build_entry_index:
+# - headword: "АНДРІЇВ ДЕНЬ -- ...", "ЛАДА (Жива) -- ...", "КУПАЛО, Купайло --- ..."
+# - bibliography: "Літ.: А.Гура, «Символика...», с.596-598; «Сказки» 4, 74."
+# Століття кирилицею ("ХІХ -- початку ХХ ст.", "ХУЇ--ХУП ст.") - не заголовки
+_ROMAN = r"[ХІУЇПМЛСГ]+(?![А-ЯЇІЄҐа-яїієґ'’])"
+_CENTURY_RANGE = (
+    rf"{_ROMAN}\s*-\s?-+\s*(?:"
+    r"(?:на\s+)?(?:початк|поч\.|нач|кін|середин|перш)"
+    rf"|[^.\n]{{0,40}}?(?<![А-ЯЇІЄҐ'’])[ХІУЇПМЛСГ]{_ROMAN})"
+)
+_HEADWORD = rf"(?!{_CENTURY_RANGE})[А-ЯЇІЄҐ][А-ЯЇІЄҐ'’]{{2,}}(?:[ \t]+[А-ЯЇІЄҐ][А-ЯЇІЄҐ'’]*)*"
+_CITATION_CHAR = r"(?:(?!-\s?-|[А-ЯЇІЄҐ]{4}|Літ\.)[^«»])"
+ENTRY_MARKER_PATTERN = re.compile(
+    rf'(?P<headword>{_HEADWORD})'
+    r"(?:\s*\([^()]{0,200}\)|,[^.«»()\n-]{0,200})?\s*-\s?-"
+    r'|(?P<bibliography>Літ\.\s*:(?:'
+    rf'{_CITATION_CHAR}{{0,150}}?(?:«[^»]{{0,200}}»{_CITATION_CHAR}{{0,80}}?){{0,3}}'
+    r'(?:\bс\.\s*|(?<=»)\s*)\d[\d\s,;\-–]*(?:та\s+ін\.?)?\.?\s*)+)'
+)
+
+# Після списку літератури починається наступна стаття; якщо OCR загубив
+# "--", її заголовок - це просто слова великими літерами на початку
+HEADING_AFTER_BIBLIOGRAPHY = re.compile(
+    r"\s*(?:\d+\s+)?([А-ЯЇІЄҐ][А-ЯЇІЄҐ'’]{3,}(?:[ \t]+[А-ЯЇІЄҐ][А-ЯЇІЄҐ'’]*)*)"
+)
+
+# Початки відрізків тексту, назва статті й ознака списку літератури для кожного;
+# відрізок з назвою None продовжує статтю попереднього розділу
+EntryIndex = namedtuple('EntryIndex', ['starts', 'names', 'is_bibliography'])
+
 # Ключові слова для виявлення язичницьких свят (не християнських)
 PAGAN_KEYWORDS = [
     'язичниц', 'слов\'ян', 'древн', 'дохристиян',
@@ -42,169 +154,1071 @@ CHRISTIAN_KEYWORDS = [
 ]
 
 
-def extract_text_from_html(html_path):
-    """Витягує текст з HTML файлу"""
+def build_keyword_classifier(pagan_keywords, christian_keywords):
+    """Будує класифікатор з обох списків ключових слів
+
+    Повертає скомпільований патерн, що знаходить ключові слова за один прохід
+    (включно з тими, що перекриваються), і словник: ключове слово в нижньому
+    регістрі -> список (тип, ключове слово) для нього та всіх його префіксів.
+    """
+    kinds = {}
+    for keyword in pagan_keywords:
+        kinds[keyword.lower()] = ('pagan', keyword)
+    for keyword in christian_keywords:
+        kinds[keyword.lower()] = ('christian', keyword)
+
+    # Довші слова перевіряються першими; коротші ключові слова, що є їх
+    # префіксами, додаються до збігу довшого
+    ordered = sorted(kinds, key=len, reverse=True)
+    lookup = {
+        key: [kinds[other] for other in ordered if key.startswith(other)]
+        for key in ordered
+    }
+    alternation = '|'.join(re.escape(key) for key in ordered)
+    pattern = re.compile(rf'(?=({alternation}))', re.IGNORECASE)
+    return pattern, lookup
+
+
+KEYWORD_PATTERN, KEYWORD_LOOKUP = build_keyword_classifier(
+    PAGAN_KEYWORDS, CHRISTIAN_KEYWORDS
+)
+
+# Результат класифікації: знайдені ключові слова обох типів та оцінка
+# (кількість язичницьких збігів мінус кількість християнських)
+KeywordMatch = namedtuple('KeywordMatch', ['pagan', 'christian', 'score'])
+
+
+def iter_epub_chapters(epub_path):
+    """Читає розділи прямо з EPUB архіву в порядку spine, без розпакування на диск
+
+    Повертає пари (ім'я файлу розділу, HTML вміст).
+    """
+    with zipfile.ZipFile(epub_path) as epub:
+        # container.xml вказує, де лежить OPF пакет
+        container = ET.fromstring(epub.read('META-INF/container.xml'))
+        rootfile = container.find('c:rootfiles/c:rootfile', CONTAINER_NS)
+        opf_path = rootfile.get('full-path')
+        opf_dir = posixpath.dirname(opf_path)
+
+        opf = ET.fromstring(epub.read(opf_path))
+        manifest = {
+            item.get('id'): item
+            for item in opf.iterfind('opf:manifest/opf:item', OPF_NS)
+        }
+
+        for itemref in opf.iterfind('opf:spine/opf:itemref', OPF_NS):
+            item = manifest.get(itemref.get('idref'))
+            if item is None or item.get('media-type') not in CHAPTER_MEDIA_TYPES:
+                continue
+            # Навігаційний документ - це зміст, а не текст книги
+            if 'nav' in (item.get('properties') or '').split():
+                continue
+
+            href = unquote(item.get('href'))
+            member = posixpath.normpath(posixpath.join(opf_dir, href))
+            try:
+                html = epub.read(member).decode('utf-8')
+            except (KeyError, UnicodeDecodeError) as e:
+                print(f"Помилка читання {member}: {e}")
+                continue
+
+            yield href, html
+
+
+# Теги, вміст яких не є текстом книги (BeautifulSoup.get_text їх теж пропускає)
+NON_TEXT_TAGS = ('script', 'style', 'template', 'rt', 'rp')
+
+# Теги, всередині яких пробіли зберігаються як є
+PRESERVE_WHITESPACE_TAGS = ('pre', 'textarea')
+
+ASCII_SPACES = ' \n\t\x0c\r'
+
+
+class _TextCollector:
+    """Збирає текст з подій парсера так само, як BeautifulSoup.get_text()
+
+    Текст між двома тегами - один рядок; рядок лише з пробілів BeautifulSoup
+    замінює на '\\n' або ' ', і тут це правило повторюється, щоб усі
+    бекенди давали однаковий текст. Методи збігаються з інтерфейсом
+    target-парсера lxml.
+    """
+
+    def __init__(self):
+        self.parts = []
+        self._run = []
+        self._skip_depth = 0
+        self._preserve_depth = 0
+
+    def _flush(self):
+        if not self._run:
+            return
+        text = ''.join(self._run)
+        self._run = []
+        if not self._preserve_depth and not text.strip(ASCII_SPACES):
+            text = '\n' if '\n' in text else ' '
+        self.parts.append(text)
+
+    def start(self, tag, attrib=None):
+        self._flush()
+        if tag in NON_TEXT_TAGS:
+            self._skip_depth += 1
+        if tag in PRESERVE_WHITESPACE_TAGS:
+            self._preserve_depth += 1
+
+    def end(self, tag):
+        self._flush()
+        if tag in NON_TEXT_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+        if tag in PRESERVE_WHITESPACE_TAGS and self._preserve_depth:
+            self._preserve_depth -= 1
+
+    def data(self, data):
+        if not self._skip_depth:
+            self._run.append(data)
+
+    def comment(self, text):
+        self._flush()
+
+    def pi(self, target, data=None):
+        self._flush()
+
+    def doctype(self, *args):
+        self._flush()
+
+    def close(self):
+        self._flush()
+        return ''.join(self.parts)
+
+
+class _StreamingTextParser(HTMLParser):
+    """Потоковий парсер зі стандартної бібліотеки, без побудови дерева"""
+
+    def __init__(self, collector):
+        super().__init__(convert_charrefs=True)
+        self.collector = collector
+
+    def handle_starttag(self, tag, attrs):
+        self.collector.start(tag)
+
+    def handle_endtag(self, tag):
+        self.collector.end(tag)
+
+    def handle_data(self, data):
+        self.collector.data(data)
+
+    def handle_comment(self, data):
+        self.collector.comment(data)
+
+    def handle_decl(self, decl):
+        self.collector.doctype(decl)
+
+    def handle_pi(self, data):
+        self.collector.pi(data)
+
+
+def _html_to_text_bs4(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    return soup.get_text()
+
+
+def _html_to_text_stdlib_stream(html):
+    collector = _TextCollector()
+    parser = _StreamingTextParser(collector)
+    parser.feed(html)
+    parser.close()
+    return collector.close()
+
+
+def _html_to_text_lxml(html):
+    try:
+        from lxml import etree
+    except ImportError:
+        raise RuntimeError("для --html-backend=lxml потрібен пакет lxml")
+
+    collector = _TextCollector()
+
+    # libxml2 не повідомляє про текст до кореневого елемента, тому пролог
+    # (XML-декларацію, DOCTYPE і переноси рядків між ними) читаємо потоково
+    root_pos = html.find('<html')
+    if root_pos > 0:
+        parser = _StreamingTextParser(collector)
+        parser.feed(html[:root_pos])
+        parser.close()
+
+    # lxml не приймає str з XML-декларацією кодування, тому передаємо байти
+    parser = etree.HTMLParser(target=collector, encoding='utf-8')
+    return etree.fromstring(html.encode('utf-8'), parser)
+
+
+# Доступні способи перетворення HTML у текст (--html-backend)
+HTML_BACKENDS = {
+    'bs4': _html_to_text_bs4,
+    'lxml': _html_to_text_lxml,
+    'stdlib-stream': _html_to_text_stdlib_stream,
+}
+
+
+def extract_text_from_html(html, source_name='', backend='bs4'):
+    """Витягує текст з HTML вмісту вибраним бекендом"""
     try:
-        with open(html_path, 'r', encoding='utf-8') as f:
-            soup = BeautifulSoup(f.read(), 'html.parser')
-            return soup.get_text()
+        return HTML_BACKENDS[backend](html)
     except Exception as e:
-        print(f"Помилка читання {html_path}: {e}")
+        print(f"Помилка читання {source_name}: {e}")
         return ""
 
 
-def find_dates_in_text(text):
-    """Знаходить всі згадки дат у тексті"""
+def scan_text(text):
+    """Знаходить згадки дат і межі речень у тексті за один прохід
+
+    Повертає список DateMatch та відсортований список позицій, з яких
+    починаються речення.
+    """
     dates = []
+    sentence_starts = []
 
-    # Патерни для пошуку дат
-    patterns = [
-        # "30 листопада/13 грудня" або "30 листопада"
-        r'(\d{1,2})\s+(січня|лютого|березня|квітня|травня|червня|липня|серпня|вересня|жовтня|листопада|грудня)',
-        # "17 / 30 січня"
-        r'(\d{1,2})\s*/\s*(\d{1,2})\s+(січня|лютого|березня|квітня|травня|червня|липня|серпня|вересня|жовтня|листопада|грудня)',
-        # Скорочені назви: "30 лис", "13 гру"
-        r'(\d{1,2})\s+(січ|лют|бер|кві|тра|чер|лип|сер|вер|жов|лис|гру)\b',
+    for match in SCAN_PATTERN.finditer(text):
+        if match.lastgroup == 'sentence_end':
+            sentence_starts.append(match.end())
+            continue
+
+        month = int(MONTHS_MAP[match.group('month').lower()])
+        new_day = match.group('new_day')
+        paired_day = match.group('paired_day')
+        if new_day:
+            new_style_day, new_style_month = int(new_day), month
+        elif paired_day:
+            new_style_day = int(paired_day)
+            new_style_month = int(MONTHS_MAP[match.group('paired_month').lower()])
+        else:
+            new_style_day = new_style_month = None
+
+        dates.append(DateMatch(
+            text=match.group(0),
+            start=match.start(),
+            end=match.end(),
+            day=int(match.group('day')),
+            month=month,
+            new_style_day=new_style_day,
+            new_style_month=new_style_month,
+        ))
+
+    return dates, sentence_starts
+
+
+def find_dates_in_text(text):
+    """Знаходить всі згадки дат у тексті за один прохід
+
+    Повертає список DateMatch з позиціями згадок у тексті.
+    """
+    return scan_text(text)[0]
+
+
+def dual_date(date_match):
+    """DualDate для згадки: пара старий/новий стиль або одна дата
+
+    У записі "30/13 грудня" старий стиль припадає на попередній місяць
+    (30 листопада). Якщо друга дата не є перекладом першої на новий стиль
+    (опечатка чи просто дві дати поряд), згадка дає дві окремі дати без пари.
+    """
+    day, month = date_match.day, date_match.month
+    new_day, new_month = date_match.new_style_day, date_match.new_style_month
+    if new_day is None:
+        return DualDate(None, f"{day:02d}.{month:02d}")
+
+    if month == new_month and day > new_day:
+        old_month = month - 1 if month > 1 else 12
+        if link_dual_date(day, old_month, new_day, new_month):
+            month = old_month
+
+    if not link_dual_date(day, month, new_day, new_month):
+        return None
+    return DualDate(f"{day:02d}.{month:02d}", f"{new_day:02d}.{new_month:02d}")
+
+
+def match_dates(date_match):
+    """Повертає дати ДД.ММ, на які вказує згадка"""
+    pair = dual_date(date_match)
+    if pair is not None:
+        return [date for date in pair if date is not None]
+
+    return [
+        f"{date_match.day:02d}.{date_match.month:02d}",
+        f"{date_match.new_style_day:02d}.{date_match.new_style_month:02d}",
     ]
 
-    for pattern in patterns:
-        matches = re.finditer(pattern, text, re.IGNORECASE)
-        for match in matches:
-            dates.append(match.group(0))
 
-    return dates
+def classify_content(text):
+    """Знаходить язичницькі та християнські ключові слова за один прохід"""
+    found = {'pagan': {}, 'christian': {}}
+    score = 0
+
+    for match in KEYWORD_PATTERN.finditer(text):
+        for kind, keyword in KEYWORD_LOOKUP[match.group(1).lower()]:
+            found[kind][keyword] = True
+            score += 1 if kind == 'pagan' else -1
+
+    return KeywordMatch(
+        pagan=list(found['pagan']),
+        christian=list(found['christian']),
+        score=score
+    )
+
+
+def is_pagan_keywords(keywords):
+    """Язичницька подія: є язичницькі ключові слова і немає християнських"""
+    return bool(keywords.pagan) and not keywords.christian
 
 
 def is_pagan_content(text):
     """Перевіряє, чи текст стосується язичницьких традицій"""
-    text_lower = text.lower()
+    return is_pagan_keywords(classify_content(text))
+
+
+def build_entry_index(text):
+    """Індексує статті словника та списки літератури в тексті за один прохід"""
+    starts, names, is_bibliography = [0], [None], [False]
+    current = None
+
+    for match in ENTRY_MARKER_PATTERN.finditer(text):
+        if match.lastgroup == 'headword':
+            current = match.group('headword').strip()
+            starts.append(match.start())
+            names.append(current)
+            is_bibliography.append(False)
+            continue
+
+        starts.append(match.start())
+        names.append(current)
+        is_bibliography.append(True)
+
+        # Текст після списку літератури - наступна стаття
+        heading = HEADING_AFTER_BIBLIOGRAPHY.match(text, match.end())
+        if heading:
+            current = heading.group(1).strip()
+        starts.append(match.end())
+        names.append(current)
+        is_bibliography.append(False)
+
+    return EntryIndex(starts, names, is_bibliography)
+
+
+def _nearest_boundary(boundaries, target, low, high):
+    """Найближча до target позиція з boundaries у межах [low, high] (бінарний пошук)"""
+    lo = bisect.bisect_left(boundaries, low)
+    hi = bisect.bisect_right(boundaries, high)
+    i = bisect.bisect_left(boundaries, target, lo, hi)
+
+    candidates = [low, high]
+    if i < hi:
+        candidates.append(boundaries[i])
+    if i > lo:
+        candidates.append(boundaries[i - 1])
+    return min(candidates, key=lambda pos: abs(pos - target))
+
+
+def snap_context_window(text, sentence_starts, date_match, low, high):
+    """Межі вікна контексту, вирівняні по реченнях
+
+    Вікно (300 символів до і 800 після згадки) розширюється або звужується до
+    найближчих меж речень у межах [low, high]. Якщо речення надто довге,
+    вікно обрізається по межі слова, щоб не різати слова навпіл.
+    """
+    target_start = max(low, date_match.start - CONTEXT_BEFORE)
+    target_end = min(high, date_match.start + CONTEXT_AFTER)
 
-    # Якщо є християнські ключові слова - пропускаємо
-    for keyword in CHRISTIAN_KEYWORDS:
-        if keyword.lower() in text_lower:
-            return False
+    start = _nearest_boundary(sentence_starts, target_start, low, date_match.start)
+    if abs(start - target_start) > MAX_SENTENCE_SNAP:
+        space = WHITESPACE.search(text, target_start, date_match.start)
+        start = space.end() if space else date_match.start
 
-    # Перевіряємо наявність язичницьких ключових слів
-    for keyword in PAGAN_KEYWORDS:
-        if keyword.lower() in text_lower:
-            return True
+    end = _nearest_boundary(sentence_starts, target_end, date_match.end, high)
+    if abs(end - target_end) > MAX_SENTENCE_SNAP:
+        end = max(text.rfind(' ', date_match.end, target_end),
+                  text.rfind('\n', date_match.end, target_end),
+                  date_match.end)
 
-    return False
+    return start, end
 
 
-def extract_event_info(text, date_str):
-    """Витягує інформацію про подію навколо дати"""
-    # Знаходимо контекст навколо дати (300 символів до і після)
-    date_pos = text.find(date_str)
-    if date_pos == -1:
+def extract_event_info(text, date_match, entries, sentence_starts=()):
+    """Витягує подію навколо згадки дати в межах її статті (None у списку літератури)"""
+    date_pos = date_match.start
+    k = bisect.bisect_right(entries.starts, date_pos) - 1
+    if entries.is_bibliography[k]:
         return None
 
-    start = max(0, date_pos - 300)
-    end = min(len(text), date_pos + 800)
-    context = text[start:end]
+    segment_start = entries.starts[k]
+    segment_end = entries.starts[k + 1] if k + 1 < len(entries.starts) else len(text)
 
-    # Шукаємо назву події (зазвичай це слова великими літерами або після "--")
-    event_pattern = r'([А-ЯЇІЄҐ][А-ЯЇІЄҐ\s]{3,50})\s*--'
-    event_match = re.search(event_pattern, context)
-    event_name = event_match.group(1).strip() if event_match else ""
+    # Контекст навколо дати (близько 300 символів до і 800 після її початку)
+    start, end = snap_context_window(
+        text, sentence_starts, date_match, segment_start, segment_end
+    )
+    # Межі без пробілів по краях, як у text[start:end].strip()
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
 
     return {
-        'date': date_str,
-        'event_name': event_name,
-        'context': context.strip()
+        'date': date_match.text,
+        'event_name': entries.names[k],
+        'context_start': start,
+        'context_end': end,
     }
 
 
-def normalize_date(date_str):
-    """Нормалізує дату до формату ДД.ММ"""
-    # Видаляємо другу дату, якщо є (наприклад, "30/13 грудня" -> "30 грудня")
-    date_str = re.sub(r'(\d{1,2})\s*/\s*\d{1,2}', r'\1', date_str)
+class EventRecord:
+    """Подія розділу: межі контексту й згадки - позиції в тексті розділу
 
-    # Знаходимо день і місяць
-    match = re.search(r'(\d{1,2})\s+(\w+)', date_str)
-    if not match:
-        return None
+    Текст береться зі спільного buffer розділу зі зсувом buffer_shift.
+    """
 
-    day = match.group(1).zfill(2)
-    month_name = match.group(2).lower()
+    __slots__ = (
+        'event_name', 'source_file', 'is_pagan', 'context_start', 'context_end',
+        'mention_start', 'mention_end', 'dual_date', 'buffer', 'buffer_shift',
+    )
 
-    month = MONTHS_MAP.get(month_name)
-    if not month:
-        return None
+    def __init__(self, event_name, source_file, is_pagan, context_start, context_end,
+                 mention_start, mention_end, dual_date=None, buffer='', buffer_shift=0):
+        # Одна копія кожної назви на всі події
+        self.event_name = sys.intern(event_name) if event_name is not None else None
+        self.source_file = sys.intern(source_file)
+        self.is_pagan = is_pagan
+        self.context_start = context_start
+        self.context_end = context_end
+        self.mention_start = mention_start
+        self.mention_end = mention_end
+        self.dual_date = dual_date
+        self.buffer = buffer
+        self.buffer_shift = buffer_shift
 
-    return f"{day}.{month}"
+    def _slice(self, start, end):
+        return self.buffer[start - self.buffer_shift:end - self.buffer_shift]
 
+    @property
+    def context(self):
+        return self._slice(self.context_start, self.context_end)
 
-def main():
-    epub_dir = 'mifolohiia_extracted/EPUB'
+    @property
+    def mention(self):
+        return self._slice(self.mention_start, self.mention_end)
 
-    if not os.path.exists(epub_dir):
-        print(f"Директорія {epub_dir} не знайдена!")
-        return
+    @property
+    def offsets(self):
+        """Позиція згадки дати в тексті розділу"""
+        return [self.mention_start, self.mention_end]
 
-    # Збираємо всі дані
-    events_by_date = defaultdict(list)
 
-    html_files = [f for f in os.listdir(epub_dir) if f.endswith('.html')]
-    print(f"Знайдено {len(html_files)} HTML файлів")
+def share_chapter_buffer(text, records):
+    """Дає подіям розділу спільний buffer з ділянок text під їхніми контекстами"""
+    spans = []
+    for record in sorted(records, key=lambda r: r.context_start):
+        if spans and record.context_start <= spans[-1][1]:
+            spans[-1][1] = max(spans[-1][1], record.context_end)
+        else:
+            spans.append([record.context_start, record.context_end])
 
-    for i, html_file in enumerate(html_files, 1):
-        if i % 50 == 0:
-            print(f"Оброблено {i}/{len(html_files)} файлів...")
+    # Зсув кожної ділянки: позиція в тексті мінус позиція в buffer
+    span_starts, shifts, parts = [], [], []
+    position = 0
+    for start, end in spans:
+        span_starts.append(start)
+        shifts.append(start - position)
+        parts.append(text[start:end])
+        position += end - start
+
+    buffer = ''.join(parts)
+    for record in records:
+        k = bisect.bisect_right(span_starts, record.context_start) - 1
+        record.buffer = buffer
+        record.buffer_shift = shifts[k]
+
+
+def process_chapter(chapter, html_backend='bs4', metrics=None):
+    """Обробляє один розділ (без спільного стану, тож і в окремому процесі)
+
+    Повертає пари (дата ДД.ММ, EventRecord) і назву останньої статті розділу
+    або None. У metrics, якщо передано, пишуться час етапів і лічильники.
+    """
+    html_file, html = chapter
+    seconds = dict.fromkeys(METRIC_STAGES, 0.0)
+    counters = {
+        'bytes_read': len(html.encode('utf-8')) if metrics is not None else 0,
+        'text_chars': 0,
+        'date_matches': 0,
+        'sentence_boundaries': 0,
+        'entries': 0,
+        'contexts_built': 0,
+        'bibliography_skipped': 0,
+        'events': 0,
+        'pagan_keywords': 0,
+        'christian_keywords': 0,
+    }
+    if metrics is not None:
+        metrics.update(source_file=html_file, cached=False, seconds=seconds, **counters)
+
+    started = time.perf_counter()
+    text = extract_text_from_html(html, html_file, html_backend)
+    seconds['html_parse'] = time.perf_counter() - started
+
+    if not text:
+        return [], None
+
+    chapter_events = []
+    records = []
+
+    # Знаходимо дати, межі речень та статті
+    started = time.perf_counter()
+    dates, sentence_starts = scan_text(text)
+    seconds['date_scan'] = time.perf_counter() - started
 
-        html_path = os.path.join(epub_dir, html_file)
-        text = extract_text_from_html(html_path)
+    started = time.perf_counter()
+    entries = build_entry_index(text)
+    seconds['context_build'] = time.perf_counter() - started
 
-        if not text:
+    for date_match in dates:
+        # Витягуємо інформацію про подію
+        started = time.perf_counter()
+        event_info = extract_event_info(text, date_match, entries, sentence_starts)
+        seconds['context_build'] += time.perf_counter() - started
+        if not event_info:
+            counters['bibliography_skipped'] += 1
             continue
+        counters['contexts_built'] += 1
 
-        # Знаходимо дати
-        dates = find_dates_in_text(text)
+        started = time.perf_counter()
+        keywords = classify_content(text[event_info['context_start']:event_info['context_end']])
+        is_pagan = is_pagan_keywords(keywords)
+        seconds['classify'] += time.perf_counter() - started
+        counters['pagan_keywords'] += len(keywords.pagan)
+        counters['christian_keywords'] += len(keywords.christian)
 
-        for date_str in dates:
-            # Витягуємо інформацію про подію
-            event_info = extract_event_info(text, date_str)
-            if not event_info:
-                continue
+        # "17 / 30 січня" дає обидві дати з одним записом
+        pair = dual_date(date_match)
+        record = EventRecord(
+            event_info['event_name'], html_file, is_pagan,
+            event_info['context_start'], event_info['context_end'],
+            date_match.start, date_match.end,
+            pair if pair is not None and pair.old_style is not None else None,
+        )
+        records.append(record)
+        for normalized_date in match_dates(date_match):
+            chapter_events.append((normalized_date, record))
 
-            # Нормалізуємо дату
-            normalized_date = normalize_date(date_str)
-            if not normalized_date:
-                continue
+    share_chapter_buffer(text, records)
+
+    if metrics is not None:
+        counters.update(
+            text_chars=len(text),
+            date_matches=len(dates),
+            sentence_boundaries=len(sentence_starts),
+            entries=len(entries.starts),
+            events=len(chapter_events),
+        )
+        metrics.update(counters)
+
+    return chapter_events, entries.names[-1]
+
+
+def measure_chapter(chapter, html_backend='bs4'):
+    """process_chapter разом зі словником метрик розділу"""
+    metrics = {}
+    started = time.perf_counter()
+    result = process_chapter(chapter, html_backend, metrics)
+    metrics['seconds']['total'] = time.perf_counter() - started
+    return result, metrics
+
+
+def _without_metrics(chapter, html_backend='bs4'):
+    return process_chapter(chapter, html_backend), None
+
+
+def iter_chapter_results(chapters, workers=1, html_backend='bs4', with_metrics=False):
+    """Обробляє розділи послідовно або в пулі процесів
+
+    Повертає пари (результат process_chapter, метрики розділу або None,
+    якщо with_metrics вимкнено). Результати завжди повертаються в порядку
+    розділів, тож вихід паралельного запуску побайтово збігається з
+    послідовним.
+    """
+    process = functools.partial(
+        measure_chapter if with_metrics else _without_metrics,
+        html_backend=html_backend
+    )
+
+    if workers <= 1:
+        for chapter in chapters:
+            yield process(chapter)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(process, chapters, chunksize=8)
+
+
+def extraction_version():
+    """Хеш усього, від чого залежить результат обробки розділу
+
+    Зміна патернів, ключових слів чи вікна контексту дає новий хеш, і всі
+    записи кешу стають недійсними.
+    """
+    settings = {
+        'format': CACHE_FORMAT_VERSION,
+        'months': MONTHS_MAP,
+        'scan_pattern': SCAN_PATTERN.pattern,
+        'entry_marker_pattern': ENTRY_MARKER_PATTERN.pattern,
+        'heading_pattern': HEADING_AFTER_BIBLIOGRAPHY.pattern,
+        'context': [CONTEXT_BEFORE, CONTEXT_AFTER, MAX_SENTENCE_SNAP],
+        'pagan_keywords': PAGAN_KEYWORDS,
+        'christian_keywords': CHRISTIAN_KEYWORDS,
+    }
+    payload = json.dumps(settings, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def encode_chapter_result(result):
+    """Результат process_chapter -> словник для JSON
+
+    Buffer розділу пишеться один раз; події посилаються на записи за
+    номером, тож пара дат старого і нового стилю лишається одним записом.
+    """
+    chapter_events, last_entry = result
+    records, numbers, events = [], {}, []
+    for normalized_date, record in chapter_events:
+        if id(record) not in numbers:
+            numbers[id(record)] = len(records)
+            pair = record.dual_date
+            records.append([
+                record.event_name, record.is_pagan,
+                record.context_start, record.context_end,
+                record.mention_start, record.mention_end, record.buffer_shift,
+                list(pair) if pair is not None else None,
+            ])
+        events.append([normalized_date, numbers[id(record)]])
+
+    # Усі записи розділу мають спільні файл і buffer
+    first = chapter_events[0][1] if chapter_events else None
+    return {
+        'source_file': first.source_file if first else None,
+        'buffer': first.buffer if first else '',
+        'records': records,
+        'events': events,
+        'last_entry': last_entry,
+    }
+
+
+def decode_chapter_result(data):
+    """Словник з encode_chapter_result -> результат process_chapter"""
+    buffer = data['buffer']
+    records = [
+        EventRecord(
+            event_name, data['source_file'], is_pagan,
+            context_start, context_end, mention_start, mention_end,
+            DualDate(*pair) if pair is not None else None,
+            buffer, buffer_shift,
+        )
+        for (event_name, is_pagan, context_start, context_end,
+             mention_start, mention_end, buffer_shift, pair) in data['records']
+    ]
+    chapter_events = [(normalized_date, records[k]) for normalized_date, k in data['events']]
+    return chapter_events, data['last_entry']
+
+
+class ChapterCache:
+    """Дисковий кеш подій розділів
+
+    Ключ запису - хеш вмісту розділу, його імені та версії налаштувань
+    (extraction_version), значення - результат process_chapter у JSON
+    (encode_chapter_result).
+    """
+
+    def __init__(self, cache_dir, version=None):
+        self.cache_dir = cache_dir
+        self.version = version or extraction_version()
+        self.hits = 0
+        self.misses = 0
+        self._used = set()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, chapter):
+        html_file, html = chapter
+        digest = hashlib.sha256()
+        for part in (self.version, html_file, html):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key):
+        self._used.add(key)
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                result = decode_chapter_result(json.load(f))
+        except (OSError, ValueError, KeyError, TypeError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return result
+
+    def put(self, key, result):
+        self._used.add(key)
+        write_json_atomic(self._path(key), encode_chapter_result(result))
+
+    def prune(self):
+        """Видаляє записи, які не знадобились у цьому запуску"""
+        removed = 0
+        for name in os.listdir(self.cache_dir):
+            key, ext = os.path.splitext(name)
+            if ext in ('.json', '.tmp') and key not in self._used:
+                os.remove(os.path.join(self.cache_dir, name))
+                removed += 1
+        return removed
+
+
+def iter_cached_chapter_results(chapters, cache, workers=1, html_backend='bs4',
+                                with_metrics=False):
+    """Як iter_chapter_results, але обробляє лише розділи, яких немає в кеші
+
+    Метрики розділу з кешу містять лише розмір і позначку cached.
+    """
+    chapters = list(chapters)
+    keys = [cache.key(chapter) for chapter in chapters]
+    cached = [cache.get(key) for key in keys]
+
+    missing = [chapter for chapter, events in zip(chapters, cached) if events is None]
+    fresh = iter_chapter_results(missing, workers, html_backend, with_metrics)
+
+    for chapter, key, chapter_events in zip(chapters, keys, cached):
+        if chapter_events is None:
+            chapter_events, metrics = next(fresh)
+            cache.put(key, chapter_events)
+        elif with_metrics:
+            html_file, html = chapter
+            metrics = {'source_file': html_file, 'cached': True,
+                       'bytes_read': len(html.encode('utf-8'))}
+        else:
+            metrics = None
+        yield chapter_events, metrics
 
-            # Зберігаємо подію
-            events_by_date[normalized_date].append({
-                'event_name': event_info['event_name'],
-                'context': event_info['context'],
-                'source_file': html_file,
-                'is_pagan': is_pagan_content(event_info['context'])
-            })
 
-    print(f"\n✓ Знайдено подій для {len(events_by_date)} унікальних дат")
+def iter_events(results, on_chapter=None):
+    """Події книги - пари (дата ДД.ММ, EventRecord) у порядку розділів
 
-    # Зберігаємо результати
-    with open('extracted_events.json', 'w', encoding='utf-8') as f:
-        json.dump(events_by_date, f, ensure_ascii=False, indent=2)
+    results - пари (результат process_chapter, метрики) з
+    iter_chapter_results чи iter_cached_chapter_results. Події без назви
+    належать статті, що продовжується з попереднього розділу, і отримують
+    її назву. on_chapter викликається з метриками кожного розділу перед
+    його подіями.
+    """
+    # Стаття, що продовжується з попереднього розділу
+    current_entry = ''
 
-    print(f"✓ Результати збережено у файл extracted_events.json")
+    for (chapter_events, last_entry), chapter_metrics in results:
+        if on_chapter is not None:
+            on_chapter(chapter_metrics)
+
+        for normalized_date, event in chapter_events:
+            if event.event_name is None:
+                event.event_name = current_entry
+            yield normalized_date, event
+
+        if last_entry is not None:
+            current_entry = last_entry
+
+
+class MetricsReport:
+    """Збирає метрики розділів і етапів основного процесу у JSON звіт"""
+
+    def __init__(self, path, settings):
+        self.path = path
+        self.settings = settings
+        self.chapters = []
+        self.main_seconds = defaultdict(float)
+        self.started = time.perf_counter()
+
+    def add_chapter(self, metrics):
+        self.chapters.append(metrics)
+
+    def add_time(self, stage, seconds):
+        self.main_seconds[stage] += seconds
+
+    def write(self, top=10):
+        totals = defaultdict(float)
+        stage_seconds = dict.fromkeys(METRIC_STAGES + ('total',), 0.0)
+        for chapter in self.chapters:
+            for name, value in chapter.items():
+                if name == 'seconds':
+                    for stage, seconds in value.items():
+                        stage_seconds[stage] += seconds
+                elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                    totals[name] += value
+        totals['chapters'] = len(self.chapters)
+        totals['cached_chapters'] = sum(1 for chapter in self.chapters if chapter['cached'])
+
+        slowest = sorted(
+            (chapter for chapter in self.chapters if not chapter['cached']),
+            key=lambda chapter: chapter['seconds']['total'],
+            reverse=True
+        )[:top]
+
+        report = {
+            **self.settings,
+            'wall_seconds': time.perf_counter() - self.started,
+            # Сума по розділах: з --workers N більша за фактичний час
+            'chapter_stage_seconds': stage_seconds,
+            'main_stage_seconds': dict(self.main_seconds),
+            'totals': {name: int(value) for name, value in totals.items()},
+            'slowest_chapters': [
+                {'source_file': chapter['source_file'], **chapter['seconds']}
+                for chapter in slowest
+            ],
+            'chapters': self.chapters,
+        }
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        return report
+
+
+class JsonEventWriter:
+    """Збирає події за датами і записує їх одним JSON об'єктом наприкінці
+
+    Уривки контексту зберігаються окремо ("passages"), а події посилаються
+    на них через passage_id.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.passages = {}
+        self.events_by_date = defaultdict(list)
+
+    def write_passage(self, passage_id, text):
+        self.passages[passage_id] = text
+
+    def write(self, normalized_date, event):
+        self.events_by_date[normalized_date].append(event)
+
+    def close(self):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump({'passages': self.passages, 'events': self.events_by_date},
+                      f, ensure_ascii=False, indent=2)
+
+
+class JsonlEventWriter:
+    """Пише кожну подію окремим рядком JSONL одразу, як її знайдено
+
+    Новий уривок контексту пишеться окремим рядком перед першою подією,
+    що на нього посилається.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'w', encoding='utf-8')
+
+    def _write_record(self, record):
+        self._file.write(json.dumps(record, ensure_ascii=False))
+        self._file.write('\n')
+
+    def write_passage(self, passage_id, text):
+        self._write_record({'passage_id': passage_id, 'text': text})
+
+    def write(self, normalized_date, event):
+        self._write_record({'date': normalized_date, **event})
+
+    def close(self):
+        self._file.close()
+
+
+EVENT_WRITERS = {
+    'json': JsonEventWriter,
+    'jsonl': JsonlEventWriter,
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Витягування дат та язичницьких свят з EPUB книги'
+    )
+    parser.add_argument(
+        '--workers', type=int, default=1,
+        help='кількість процесів для обробки розділів (за замовчуванням 1)'
+    )
+    parser.add_argument(
+        '--html-backend', choices=sorted(HTML_BACKENDS), default='bs4',
+        help='спосіб перетворення HTML у текст (за замовчуванням bs4); '
+             'усі бекенди дають однаковий текст'
+    )
+    parser.add_argument(
+        '--format', choices=sorted(EVENT_WRITERS), default='json',
+        help='формат результату: json - один об\'єкт з подіями за датами, '
+             'jsonl - одна подія на рядок, записується потоково'
+    )
+    parser.add_argument(
+        '--output',
+        help='файл результату (за замовчуванням extracted_events.json '
+             'або extracted_events.jsonl)'
+    )
+    parser.add_argument(
+        '--cache-dir', default=CACHE_DIR,
+        help=f'директорія кешу оброблених розділів (за замовчуванням {CACHE_DIR})'
+    )
+    parser.add_argument(
+        '--no-cache', action='store_true',
+        help='обробити всі розділи заново, не читаючи і не оновлюючи кеш'
+    )
+    parser.add_argument(
+        '--dedup-threshold', type=float, default=DEDUP_THRESHOLD,
+        help='схожість (0..1), з якої уривки контексту вважаються однаковими '
+             f'і зберігаються один раз (за замовчуванням {DEDUP_THRESHOLD}; '
+             '1 - лише дослівні повтори)'
+    )
+    parser.add_argument(
+        '--metrics', nargs='?', const=METRICS_FILE, metavar='FILE',
+        help='записати JSON звіт з часом етапів і лічильниками для кожного '
+             f'розділу (за замовчуванням {METRICS_FILE})'
+    )
+    parser.add_argument(
+        '--profile', metavar='FILE',
+        help='записати профіль cProfile (pstats); з --workers > 1 профілюється '
+             'лише основний процес'
+    )
+    return parser.parse_args()
+
+
+def run(args):
+    if not os.path.exists(EPUB_FILE):
+        print(f"Файл {EPUB_FILE} не знайдено!")
+        return
+
+    output_file = args.output or OUTPUT_FILES[args.format]
+    writer = EVENT_WRITERS[args.format](output_file)
+
+    report = None
+    if args.metrics:
+        report = MetricsReport(args.metrics, {
+            'epub': EPUB_FILE,
+            'html_backend': args.html_backend,
+            'workers': args.workers,
+            'cache': not args.no_cache,
+        })
+
+    # Для статистики тримаємо лише лічильники, а не самі події
+    events_per_date = {}
+    first_event_names = {}
+    total_count = 0
+    pagan_count = 0
+
+    chapters = iter_epub_chapters(EPUB_FILE)
+
+    cache = None
+    if args.no_cache:
+        results = iter_chapter_results(
+            chapters, args.workers, args.html_backend, report is not None
+        )
+    else:
+        cache = ChapterCache(args.cache_dir)
+        results = iter_cached_chapter_results(
+            chapters, cache, args.workers, args.html_backend, report is not None
+        )
+
+    # Кожен окремий уривок контексту зберігається один раз
+    passages = PassageStore(args.dedup_threshold)
+
+    i = 0
+
+    def on_chapter(chapter_metrics):
+        nonlocal i
+        i += 1
+        if i % 50 == 0:
+            print(f"Оброблено {i} файлів...")
+        if report is not None:
+            report.add_chapter(chapter_metrics)
+
+    try:
+        # Зберігаємо події в порядку розділів
+        for normalized_date, event in iter_events(results, on_chapter):
+            # Майже однаковий уривок підходить, лише якщо містить ту саму згадку дати
+            started = time.perf_counter()
+            context = event.context
+            passage_id, is_new = passages.add(context, anchor=event.mention)
+            deduplicated = time.perf_counter()
+            if is_new:
+                writer.write_passage(passage_id, context)
+            event = {
+                'event_name': event.event_name,
+                'passage_id': passage_id,
+                'source_file': event.source_file,
+                'is_pagan': event.is_pagan,
+                'offsets': event.offsets,
+                **({'dual_date': dict(event.dual_date._asdict())} if event.dual_date else {}),
+            }
+            writer.write(normalized_date, event)
+            if report is not None:
+                report.add_time('passage_dedup', deduplicated - started)
+                report.add_time('write', time.perf_counter() - deduplicated)
+
+            events_per_date[normalized_date] = events_per_date.get(normalized_date, 0) + 1
+            first_event_names.setdefault(normalized_date, event['event_name'])
+            total_count += 1
+            if event['is_pagan']:
+                pagan_count += 1
+    finally:
+        started = time.perf_counter()
+        writer.close()
+        if report is not None:
+            report.add_time('write', time.perf_counter() - started)
+
+    print(f"Прочитано {i} HTML файлів з {EPUB_FILE}")
+    if cache is not None:
+        removed = cache.prune()
+        print(f"Кеш: {cache.hits} з кешу, {cache.misses} оброблено заново, "
+              f"{removed} застарілих записів видалено")
+    print(f"\n✓ Знайдено подій для {len(events_per_date)} унікальних дат")
+    print(f"✓ Результати збережено у файл {output_file}")
 
     # Виводимо статистику
     print(f"\nСтатистика:")
-    pagan_count = sum(1 for events in events_by_date.values()
-                      for e in events if e['is_pagan'])
-    total_count = sum(len(events) for events in events_by_date.values())
     print(f"  Всього подій: {total_count}")
     print(f"  Язичницьких подій: {pagan_count}")
-    print(f"  Унікальних дат: {len(events_by_date)}")
+    print(f"  Унікальних дат: {len(events_per_date)}")
+    print(f"  Унікальних уривків: {len(passages)} "
+          f"(повторів: {passages.exact_duplicates} дослівних, "
+          f"{passages.near_duplicates} майже однакових; "
+          f"заощаджено {passages.duplicate_chars} символів)")
 
     # Показуємо приклади
     print(f"\nПриклади знайдених дат:")
-    for date in sorted(list(events_by_date.keys())[:10]):
-        events = events_by_date[date]
-        print(f"  {date}: {len(events)} подій")
-        for event in events[:1]:
-            if event['event_name']:
-                print(f"    - {event['event_name']}")
+    for date in sorted(list(events_per_date.keys())[:10]):
+        print(f"  {date}: {events_per_date[date]} подій")
+        if first_event_names[date]:
+            print(f"    - {first_event_names[date]}")
+
+    if report is not None:
+        summary = report.write()
+        print(f"\n✓ Метрики збережено у файл {args.metrics}")
+        print("  Час етапів (сума по розділах):")
+        for stage in METRIC_STAGES:
+            print(f"    {stage}: {summary['chapter_stage_seconds'][stage]:.3f} с")
+        for chapter in summary['slowest_chapters'][:3]:
+            print(f"  Найповільніший розділ: {chapter['source_file']} "
+                  f"({chapter['total']:.3f} с)")
+
+
+def main():
+    args = parse_args()
+
+    if not args.profile:
+        run(args)
+        return
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.runcall(run, args)
+    finally:
+        profiler.dump_stats(args.profile)
+        print(f"✓ Профіль збережено у файл {args.profile} "
+              f"(python -m pstats {args.profile})")
 
 
 if __name__ == '__main__':
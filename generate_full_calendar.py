@@ -4,69 +4,123 @@
 Скрипт для створення повного CSV календаря на 365 днів
 """
 
-import json
 import csv
-from datetime import datetime, timedelta
+import os
 from collections import defaultdict
 
+from calendar_dates import DualDate, dates_for_year
+from calendar_source import SOURCE_CSV, load_day_index
+from movable_feasts import iter_feast_dates
+from passage_store import iter_extracted_jsonl, read_extracted_json
 
-def load_existing_csv():
-    """Завантажує існуючі дані з CSV файлу №2"""
-    existing_data = {}
+EXTRACTED_EVENTS_JSON = 'extracted_events.json'
+EXTRACTED_EVENTS_JSONL = 'extracted_events.jsonl'
 
-    try:
-        with open('podii_z_tradytsiiamy_refined (2).csv', 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                date = row['Дата'].strip()
-                # Пропускаємо порожні та некоректні записи
-                if date and date not in [';;;;', '""";;;;', ''] and '.' in date:
-                    try:
-                        # Перевіряємо формат ДД.ММ
-                        parts = date.split('.')
-                        if len(parts) == 2:
-                            day = parts[0].strip('"')
-                            month = parts[1].strip('"')
-                            if day.isdigit() and month.isdigit():
-                                normalized_date = f"{day.zfill(2)}.{month.zfill(2)}"
-                                existing_data[normalized_date] = {
-                                    'event': row.get('Подія', '').strip(),
-                                    'description': row.get('Опис', '').strip(),
-                                    'traditions': row.get('Традиції', '').strip(),
-                                    'preparation': row.get('Як підготуватися', '').strip()
-                                }
-                    except:
-                        pass
-    except Exception as e:
-        print(f"Помилка читання CSV: {e}")
+# Максимальна довжина опису події з EPUB
+MAX_DESCRIPTION_LENGTH = 1000
+
+# Колонки календаря; ті самі, що й у джерелі (calendar_source.CSV_FIELDS)
+CALENDAR_FIELDS = ['Дата', 'Подія', 'Опис', 'Традиції', 'Як підготуватися']
+
+# Рухомі свята мають різні дати щороку, тому пишуться окремим файлом
+MOVABLE_FEASTS_CSV = 'ukrainian_movable_feasts.csv'
+MOVABLE_FEAST_YEARS = (2024, 2035)
+
+
+def load_existing_csv():
+    """Завантажує існуючі дані з CSV файлу №2 через спільний індекс днів"""
+    existing_data = load_day_index(SOURCE_CSV)
 
     print(f"✓ Завантажено {len(existing_data)} записів з існуючого CSV")
     return existing_data
 
 
+def is_old_style_twin(date, event):
+    """Чи є подія під датою date старим стилем пари "30 листопада / 13 грудня"
+
+    Така пара - одне свято, і в календарі воно стоїть лише під новим стилем.
+    """
+    dual = event.get('dual_date')
+    return bool(dual) and dual['old_style'] == date and dual['new_style'] != date
+
+
+def pick_date_events(dated_events):
+    """Зводить потік пар (дата, подія) до {дата: [подія для календаря]}
+
+    Для дати лишається перша язичницька подія, а якщо такої немає - перша
+    будь-яка (див. extract_event_details). Старостильні двійники пар
+    пропускаються, тож свято не займає двох днів календаря.
+    """
+    events = {}
+    for date, event in dated_events:
+        if is_old_style_twin(date, event):
+            continue
+        current = events.get(date)
+        if current is None or (event.get('is_pagan') and not current[0].get('is_pagan')):
+            events[date] = [event]
+    return events
+
+
+def extracted_events_path():
+    """Новіший з extracted_events.jsonl і extracted_events.json або None"""
+    candidates = [path for path in (EXTRACTED_EVENTS_JSONL, EXTRACTED_EVENTS_JSON)
+                  if os.path.exists(path)]
+    return max(candidates, key=os.path.getmtime) if candidates else None
+
+
+def iter_extracted_events(path):
+    """Пари (дата, подія) з JSONL або JSON з подіями"""
+    if path.endswith('.jsonl'):
+        return ((record['date'], record) for record in iter_extracted_jsonl(path))
+    return (
+        (date, event)
+        for date, events in read_extracted_json(path).items()
+        for event in events
+    )
+
+
 def load_extracted_events():
-    """Завантажує витягнуті з EPUB дані"""
+    """Завантажує витягнуті з EPUB дані (JSONL або JSON, новіший з двох)
+
+    JSONL читається потоково: extract_event_details бере першу язичницьку
+    подію дати, а якщо такої немає - першу будь-яку, тому для кожної дати
+    тримаємо лише одну подію.
+    """
+    path = extracted_events_path()
+    if path is None:
+        print(f"Помилка читання JSON: файл {EXTRACTED_EVENTS_JSON} не знайдено")
+        return {}
+
     try:
-        with open('extracted_events.json', 'r', encoding='utf-8') as f:
-            events = json.load(f)
-        print(f"✓ Завантажено {len(events)} дат з EPUB")
+        events = pick_date_events(iter_extracted_events(path))
+        print(f"✓ Завантажено {len(events)} дат з EPUB ({path})")
         return events
     except Exception as e:
         print(f"Помилка читання JSON: {e}")
         return {}
 
 
-def generate_all_dates():
-    """Генерує список всіх дат року"""
-    dates = []
-    start_date = datetime(2024, 1, 1)  # 2024 - високосний рік
+def load_dual_dates():
+    """{ДД.ММ за новим стилем: DualDate} для пар старий/новий стиль з книги"""
+    path = extracted_events_path()
+    if path is None:
+        return {}
+
+    dual_dates = {}
+    try:
+        for date, event in iter_extracted_events(path):
+            dual = event.get('dual_date')
+            if dual and dual['new_style'] == date:
+                dual_dates.setdefault(date, DualDate(dual['old_style'], date))
+    except Exception as e:
+        print(f"Помилка читання JSON: {e}")
+        return {}
+    return dual_dates
 
-    for i in range(366):  # 366 днів для високосного року
-        current_date = start_date + timedelta(days=i)
-        date_str = current_date.strftime("%d.%m")
-        dates.append(date_str)
 
-    return dates
+def generate_all_dates(year=2024):
+    """Генерує список всіх дат року (2024 - високосний, тож з 29 лютого)"""
+    return list(dates_for_year(year))
 
 
 def clean_text(text):
@@ -80,6 +134,19 @@ def clean_text(text):
     return text
 
 
+def truncate_at_sentence(text, limit):
+    """Обрізає текст до limit символів по кінцю речення (або хоча б слова)"""
+    if len(text) <= limit:
+        return text
+
+    cut = max(text.rfind(mark, 0, limit) for mark in ('. ', '! ', '? '))
+    if cut > 0:
+        return text[:cut + 1] + ".."
+
+    cut = text.rfind(' ', 0, limit)
+    return text[:cut if cut > 0 else limit] + "..."
+
+
 def extract_event_details(events_list):
     """Витягує деталі події зі списку подій"""
     if not events_list:
@@ -103,8 +170,7 @@ def extract_event_details(events_list):
         context = context.split('Літ.:')[0].strip()
 
     # Обмежуємо довжину
-    if len(context) > 1000:
-        context = context[:1000] + "..."
+    context = truncate_at_sentence(context, MAX_DESCRIPTION_LENGTH)
 
     return event_name, context, ""
 
@@ -128,6 +194,48 @@ def get_seasonal_info(month):
     return seasons.get(month, ("", ""))
 
 
+def iter_calendar_rows(existing_data, extracted_events, all_dates):
+    """Рядки календаря для кожної дати разом з ознакою, чи день заповнений
+
+    existing_data - індекс днів джерела CSV, extracted_events - події з
+    EPUB у вигляді {дата: [події]} (див. pick_date_events).
+    """
+    for date_str in all_dates:
+        row = {'Дата': date_str}
+        filled = False
+
+        # Пріоритет 1: Існуючі дані з CSV
+        if date_str in existing_data:
+            data = existing_data[date_str]
+            row['Подія'] = data['event']
+            row['Опис'] = data['description']
+            row['Традиції'] = data['traditions']
+            row['Як підготуватися'] = data['preparation']
+            filled = True
+
+        # Пріоритет 2: Витягнуті дані з EPUB
+        elif date_str in extracted_events:
+            event_name, description, traditions = extract_event_details(extracted_events[date_str])
+            row['Подія'] = event_name
+            row['Опис'] = description
+            row['Традиції'] = traditions
+            row['Як підготуватися'] = ""
+            if event_name or description:
+                filled = True
+
+        # Пріоритет 3: Порожнє поле (для ручного заповнення)
+        else:
+            # Додаємо сезонну інформацію як підказку
+            month = int(date_str.split('.')[1])
+            season, season_info = get_seasonal_info(month)
+            row['Подія'] = ""
+            row['Опис'] = ""
+            row['Традиції'] = ""
+            row['Як підготуватися'] = ""
+
+        yield row, filled
+
+
 def generate_calendar_csv():
     """Генерує повний CSV календар"""
 
@@ -140,44 +248,14 @@ def generate_calendar_csv():
     output_file = 'ukrainian_pagan_calendar_full.csv'
 
     with open(output_file, 'w', encoding='utf-8', newline='') as f:
-        fieldnames = ['Дата', 'Подія', 'Опис', 'Традиції', 'Як підготуватися']
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer = csv.DictWriter(f, fieldnames=CALENDAR_FIELDS)
         writer.writeheader()
 
         filled_count = 0
 
-        for date_str in all_dates:
-            row = {'Дата': date_str}
-
-            # Пріоритет 1: Існуючі дані з CSV
-            if date_str in existing_data:
-                data = existing_data[date_str]
-                row['Подія'] = data['event']
-                row['Опис'] = data['description']
-                row['Традиції'] = data['traditions']
-                row['Як підготуватися'] = data['preparation']
+        for row, filled in iter_calendar_rows(existing_data, extracted_events, all_dates):
+            if filled:
                 filled_count += 1
-
-            # Пріоритет 2: Витягнуті дані з EPUB
-            elif date_str in extracted_events:
-                event_name, description, traditions = extract_event_details(extracted_events[date_str])
-                row['Подія'] = event_name
-                row['Опис'] = description
-                row['Традиції'] = traditions
-                row['Як підготуватися'] = ""
-                if event_name or description:
-                    filled_count += 1
-
-            # Пріоритет 3: Порожнє поле (для ручного заповнення)
-            else:
-                # Додаємо сезонну інформацію як підказку
-                month = int(date_str.split('.')[1])
-                season, season_info = get_seasonal_info(month)
-                row['Подія'] = ""
-                row['Опис'] = ""
-                row['Традиції'] = ""
-                row['Як підготуватися'] = ""
-
             writer.writerow(row)
 
     print(f"\n✓ Створено файл {output_file}")
@@ -186,7 +264,25 @@ def generate_calendar_csv():
     print(f"✓ Порожніх днів: {len(all_dates) - filled_count}")
 
 
+def generate_movable_feasts_csv(first_year, last_year):
+    """Генерує CSV з датами рухомих свят на роки first_year..last_year
+
+    Дати беруться з кешованої таблиці Великодня (movable_feasts.py).
+    """
+    rows = 0
+    with open(MOVABLE_FEASTS_CSV, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Рік', 'Дата', 'Свято', 'Днів від Великодня'])
+        for year, feast, date in iter_feast_dates(first_year, last_year):
+            writer.writerow([year, date.strftime('%d.%m'), feast.title, feast.offset])
+            rows += 1
+
+    print(f"\n✓ Створено файл {MOVABLE_FEASTS_CSV}")
+    print(f"✓ Рухомих свят на {first_year}-{last_year} роки: {rows}")
+
+
 if __name__ == '__main__':
     print("Генерація повного календаря українських язичницьких свят...\n")
     generate_calendar_csv()
+    generate_movable_feasts_csv(*MOVABLE_FEAST_YEARS)
     print("\n✅ Готово!")
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Рухомі свята, що відраховуються від православного Великодня
+
+Дата Великодня рахується одним пакетом для всього проміжку років і
+зберігається як компактна таблиця "рік -> номер дня в році". Дата будь-якого
+рухомого свята - це один пошук у таблиці плюс сталий зсув від Великодня.
+"""
+
+import datetime
+import functools
+import json
+import os
+from array import array
+from collections import namedtuple
+
+from calendar_dates import julian_ordinal
+from calendar_source import write_cache_json
+
+# Серіалізована таблиця лежить поруч із модулем, тож її читають і скрипти з
+# кореня, і database/import_csv.py
+TABLE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'movable_feasts.table.json')
+TABLE_FORMAT_VERSION = 1
+
+# Проміжок років, який таблиця покриває щонайменше
+DEFAULT_FIRST_YEAR = 2000
+DEFAULT_LAST_YEAR = 2100
+
+MovableFeast = namedtuple('MovableFeast', ['key', 'title', 'offset'])
+
+# Зсув у днях від Великодньої неділі
+MOVABLE_FEASTS = (
+    MovableFeast('maslyana', 'Масляна (Колодій)', -55),
+    MovableFeast('proshchena_nedilia', 'Прощена неділя', -49),
+    MovableFeast('velykyi_pist', 'Початок Великого посту', -48),
+    MovableFeast('verbna_nedilia', 'Вербна неділя', -7),
+    MovableFeast('chystyi_chetver', 'Чистий четвер', -3),
+    MovableFeast('velykden', 'Великдень', 0),
+    MovableFeast('provody', 'Провідна неділя (Проводи)', 7),
+    MovableFeast('radunytsia', 'Радуниця', 9),
+    MovableFeast('voznesinnia', 'Вознесіння (Ушестя)', 39),
+    MovableFeast('klechalna_subota', 'Клечальна субота', 48),
+    MovableFeast('zeleni_sviata', 'Зелені свята (Трійця)', 49),
+    MovableFeast('rusalnyi_tyzhden', 'Русальний тиждень (Русалії)', 50),
+    MovableFeast('mavskyi_velykden', 'Мавський Великдень', 53),
+    MovableFeast('petrivka', 'Початок Петрівки', 57),
+)
+FEASTS_BY_KEY = {feast.key: feast for feast in MOVABLE_FEASTS}
+
+# Таблиця днів Великодня: days[рік - first_year] - номер дня в році (з 1)
+EasterTable = namedtuple('EasterTable', ['first_year', 'days'])
+
+
+def compute_easter_days(first_year, last_year):
+    """Номери днів Великодня (з 1) за новим стилем для всіх років одним пакетом
+
+    Юліанська пасхалія (алгоритм Міуса) дає дату за старим стилем, яка
+    переводиться в григоріанський ординал.
+    """
+    years = range(first_year, last_year + 1)
+    cycles = [((19 * (year % 19) + 15) % 30, year) for year in years]
+    sums = [d + (2 * (year % 4) + 4 * (year % 7) - d + 34) % 7 + 114 for d, year in cycles]
+    ordinals = [
+        julian_ordinal(total % 31 + 1, total // 31, year)
+        for total, year in zip(sums, years)
+    ]
+    return array('H', (
+        ordinal - datetime.date(year, 1, 1).toordinal() + 1
+        for ordinal, year in zip(ordinals, years)
+    ))
+
+
+def _read_table(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if data.get('version') != TABLE_FORMAT_VERSION:
+        return None
+    return EasterTable(data['first_year'], array('H', data['easter']))
+
+
+def _write_table(path, table):
+    data = {
+        'version': TABLE_FORMAT_VERSION,
+        'first_year': table.first_year,
+        'easter': table.days.tolist(),
+    }
+    write_cache_json(path, data)
+
+
+@functools.lru_cache(maxsize=None)
+def load_easter_table(first_year=DEFAULT_FIRST_YEAR, last_year=DEFAULT_LAST_YEAR, path=TABLE_FILE):
+    """EasterTable, що покриває роки first_year..last_year
+
+    Результат запам'ятовується в процесі й зберігається у path. Якщо
+    збережена таблиця не покриває потрібних років, вона перераховується
+    для об'єднаного проміжку.
+    """
+    table = _read_table(path)
+    if table is not None:
+        table_last_year = table.first_year + len(table.days) - 1
+        if table.first_year <= first_year and last_year <= table_last_year:
+            return table
+        first_year = min(first_year, table.first_year)
+        last_year = max(last_year, table_last_year)
+
+    table = EasterTable(first_year, compute_easter_days(first_year, last_year))
+    _write_table(path, table)
+    return table
+
+
+def easter_day_of_year(year, table=None):
+    """Номер дня Великодня (з 1) у році year"""
+    if table is None or not table.first_year <= year < table.first_year + len(table.days):
+        table = load_easter_table(min(year, DEFAULT_FIRST_YEAR), max(year, DEFAULT_LAST_YEAR))
+    return table.days[year - table.first_year]
+
+
+def feast_date(year, feast, table=None):
+    """datetime.date рухомого свята (MovableFeast або його ключ) у році year"""
+    if isinstance(feast, str):
+        feast = FEASTS_BY_KEY[feast]
+    day = easter_day_of_year(year, table) - 1 + feast.offset
+    return datetime.date(year, 1, 1) + datetime.timedelta(days=day)
+
+
+def iter_feast_dates(first_year, last_year):
+    """Трійки (рік, MovableFeast, datetime.date) у календарному порядку"""
+    table = load_easter_table(min(first_year, DEFAULT_FIRST_YEAR), max(last_year, DEFAULT_LAST_YEAR))
+    for year in range(first_year, last_year + 1):
+        for feast in MOVABLE_FEASTS:
+            yield year, feast, feast_date(year, feast, table)
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Спільні уривки контексту: дедуплікація майже однакових текстів і читання
+extracted_events.json / .jsonl, де події посилаються на уривки за ID
+"""
+
+import json
+import re
+import zlib
+from collections import defaultdict
+
+# Уривок розбивається на шинґли - послідовності з SHINGLE_SIZE слів
+SHINGLE_SIZE = 5
+WORD = re.compile(r'\w+')
+
+# MinHash з однією перестановкою: кожен шинґл потрапляє в один з NUM_PERM
+# кошиків, і підпис - мінімальне значення в кожному кошику. Кошики
+# групуються в LSH_BANDS смуг по NUM_PERM // LSH_BANDS. Уривки зі збігом
+# хоча б однієї смуги - кандидати, для них рахується точна схожість
+# Жаккара за шинґлами.
+NUM_PERM = 32
+LSH_BANDS = 8
+_BUCKET_BITS = NUM_PERM.bit_length() - 1
+_VALUE_BITS = 64 - _BUCKET_BITS
+_VALUE_MASK = (1 << _VALUE_BITS) - 1
+_MIX = 0x9E3779B97F4A7C15
+_EMPTY_BUCKET = 1 << 64
+
+# Уривки зі схожістю від цього порогу вважаються одним уривком
+DEDUP_THRESHOLD = 0.8
+
+
+def shingles(text):
+    """Множина хешів шинґлів (стабільних між запусками, на відміну від hash())"""
+    words = WORD.findall(text.lower())
+    if len(words) < SHINGLE_SIZE:
+        return {zlib.crc32(' '.join(words).encode('utf-8'))}
+    return {
+        zlib.crc32(' '.join(words[i:i + SHINGLE_SIZE]).encode('utf-8'))
+        for i in range(len(words) - SHINGLE_SIZE + 1)
+    }
+
+
+def minhash(shingle_set):
+    """Підпис за один прохід по шинґлах
+
+    Хеш шинґла перемішується множенням на непарну 64-бітну константу:
+    старші біти визначають кошик, решта - значення в ньому.
+    """
+    signature = [_EMPTY_BUCKET] * NUM_PERM
+    for h in shingle_set:
+        mixed = (h * _MIX) & 0xFFFFFFFFFFFFFFFF
+        bucket = mixed >> _VALUE_BITS
+        value = mixed & _VALUE_MASK
+        if value < signature[bucket]:
+            signature[bucket] = value
+    return tuple(signature)
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+class PassageStore:
+    """Зберігає кожен окремий уривок один раз і видає йому ID
+
+    add() повертає ID уривка, що вже є в сховищі, якщо новий текст
+    збігається з ним дослівно або зі схожістю не нижче threshold. Якщо
+    задано anchor (наприклад, згадку дати), майже однаковий уривок
+    приймається лише тоді, коли теж містить anchor - інакше подія
+    втратила б свою дату. ID видаються в порядку додавання, тож результат
+    детермінований.
+    """
+
+    def __init__(self, threshold=DEDUP_THRESHOLD):
+        self.threshold = threshold
+        self.texts = {}
+        self.exact_duplicates = 0
+        self.near_duplicates = 0
+        self.duplicate_chars = 0
+        self._by_text = {}
+        self._shingles = {}
+        self._buckets = defaultdict(list)
+
+    def __len__(self):
+        return len(self.texts)
+
+    def add(self, text, anchor=None):
+        """Повертає (ID уривка, чи він новий)"""
+        passage_id = self._by_text.get(text)
+        if passage_id is not None:
+            self.exact_duplicates += 1
+            self.duplicate_chars += len(text)
+            return passage_id, False
+
+        shingle_set = shingles(text)
+        band_keys = self._band_keys(minhash(shingle_set)) if self.threshold < 1 else ()
+
+        passage_id = self._find_similar(shingle_set, band_keys, anchor)
+        if passage_id is not None:
+            self.near_duplicates += 1
+            self.duplicate_chars += len(text)
+            return passage_id, False
+
+        passage_id = f"p{len(self.texts) + 1:05d}"
+        self.texts[passage_id] = text
+        self._by_text[text] = passage_id
+        self._shingles[passage_id] = shingle_set
+        for key in band_keys:
+            self._buckets[key].append(passage_id)
+        return passage_id, True
+
+    def _band_keys(self, signature):
+        rows = NUM_PERM // LSH_BANDS
+        return [(band, signature[band * rows:(band + 1) * rows]) for band in range(LSH_BANDS)]
+
+    def _find_similar(self, shingle_set, band_keys, anchor=None):
+        seen = set()
+        for key in band_keys:
+            for passage_id in self._buckets.get(key, ()):
+                if passage_id in seen:
+                    continue
+                seen.add(passage_id)
+                if anchor is not None and anchor not in self.texts[passage_id]:
+                    continue
+                if jaccard(shingle_set, self._shingles[passage_id]) >= self.threshold:
+                    return passage_id
+        return None
+
+
+def _resolve(event, passages):
+    """Подія з полем context, узятим з уривка за passage_id"""
+    if 'context' in event or 'passage_id' not in event:
+        return event
+    return {**event, 'context': passages.get(event['passage_id'], '')}
+
+
+def read_extracted_json(path):
+    """Читає extracted_events.json у словник {дата: [події з context]}
+
+    Підтримує і формат з уривками ({"passages": ..., "events": ...}), і
+    старий, де кожна подія містить власний context.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    if 'events' not in data or 'passages' not in data:
+        return data
+
+    passages = data['passages']
+    return {
+        date: [_resolve(event, passages) for event in events]
+        for date, events in data['events'].items()
+    }
+
+
+def iter_extracted_jsonl(path):
+    """Потоково читає extracted_events.jsonl і повертає події з context
+
+    Рядок уривка ({"passage_id", "text"}) завжди йде перед першою подією,
+    що на нього посилається.
+    """
+    passages = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if 'date' not in record:
+                passages[record['passage_id']] = record['text']
+                continue
+            yield _resolve(record, passages)
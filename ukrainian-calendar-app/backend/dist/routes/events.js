@@ -45,6 +45,44 @@ router.get('/', async (req, res) => {
         });
     }
 });
+// GET /api/events/search?q=... - Пошук за словами в назві, описі та традиціях
+router.get('/search', async (req, res) => {
+    try {
+        // Кожне слово шукається як префікс: "Купал" знаходить "Купала", "Купало"
+        const terms = String(req.query.q || '').split(/[^\p{L}\p{N}]+/u).filter(Boolean);
+        if (terms.length === 0) {
+            return res.status(400).json({
+                success: false,
+                error: 'Search query is required'
+            });
+        }
+        const result = await database_1.default.query(`
+      SELECT
+        e.id,
+        e.date_day,
+        e.date_month,
+        e.title,
+        e.description,
+        ts_rank(e.search_vector, query) as rank
+      FROM events e, to_tsquery('ukrainian_unaccent', $1) query
+      WHERE e.is_active = true AND e.search_vector @@ query
+      ORDER BY rank DESC, e.day_of_year
+      LIMIT 50
+    `, [terms.map((term) => `${term}:*`).join(' & ')]);
+        res.json({
+            success: true,
+            data: result.rows,
+            count: result.rows.length
+        });
+    }
+    catch (error) {
+        console.error('Error searching events:', error);
+        res.status(500).json({
+            success: false,
+            error: 'Failed to search events'
+        });
+    }
+});
 // GET /api/events/:id - Отримати одну подію
 router.get('/:id', async (req, res) => {
     try {
@@ -124,8 +162,21 @@ router.get('/date/:month/:day', async (req, res) => {
 // GET /api/events/month/:month - Отримати події за місяць
 router.get('/month/:month', async (req, res) => {
     try {
-        const { month } = req.params;
+        const month = parseInt(req.params.month, 10);
+        if (!(month >= 1 && month <= 12)) {
+            return res.status(400).json({
+                success: false,
+                error: 'Invalid month'
+            });
+        }
+        // Місяць - суцільний діапазон idx_events_day_of_year. Межі рахує база:
+        // 2000 - високосний рік, тож номер дня в ньому збігається з day_of_year
         const result = await database_1.default.query(`
+      WITH bounds AS (
+        SELECT
+          EXTRACT(doy FROM make_date(2000, $1, 1))::int AS first_day,
+          EXTRACT(doy FROM make_date(2000, $1, 1) + interval '1 month - 1 day')::int AS last_day
+      )
       SELECT
         e.id,
         e.date_day,
@@ -141,11 +192,11 @@ router.get('/month/:month', async (req, res) => {
             'title', ei.image_title
           ) ORDER BY ei.image_order
         ) FILTER (WHERE ei.id IS NOT NULL) as images
-      FROM events e
+      FROM bounds b, events e
       LEFT JOIN event_images ei ON e.id = ei.event_id
-      WHERE e.date_month = $1 AND e.is_active = true
+      WHERE e.day_of_year BETWEEN b.first_day AND b.last_day AND e.is_active = true
       GROUP BY e.id
-      ORDER BY e.date_day
+      ORDER BY e.day_of_year
     `, [month]);
         res.json({
             success: true,
@@ -164,12 +215,25 @@ router.get('/month/:month', async (req, res) => {
 // GET /api/events/upcoming/:days - Отримати найближчі події (наступні N днів)
 router.get('/upcoming/:days', async (req, res) => {
     try {
-        const { days } = req.params;
+        const days = Math.min(Math.max(parseInt(req.params.days, 10) || 1, 1), 366);
         const today = new Date();
-        const currentMonth = today.getMonth() + 1;
-        const currentDay = today.getDate();
-        // Це спрощена версія - для production потрібна більш складна логіка
+        const lastDay = new Date(today);
+        lastDay.setDate(today.getDate() + days - 1);
+        // Вікно [start_day, end_day] у днях високосного року (як day_of_year,
+        // рахує база). Якщо воно переходить через кінець року, це два діапазони
+        // індексу: [start_day, 366] і [1, end_day]. У невисокосний рік 29 лютого
+        // (день 60) потрапляє у вікно, що охоплює 28 лютого і 1 березня.
+        const range = days >= 365
+            ? 'TRUE'
+            : lastDay.getFullYear() !== today.getFullYear()
+                ? '(e.day_of_year >= b.start_day OR e.day_of_year <= b.end_day)'
+                : 'e.day_of_year BETWEEN b.start_day AND b.end_day';
         const result = await database_1.default.query(`
+      WITH bounds AS (
+        SELECT
+          EXTRACT(doy FROM make_date(2000, $1, $2))::int AS start_day,
+          EXTRACT(doy FROM make_date(2000, $3, $4))::int AS end_day
+      )
       SELECT
         e.id,
         e.date_day,
@@ -183,17 +247,13 @@ router.get('/upcoming/:days', async (req, res) => {
             'title', ei.image_title
           ) ORDER BY ei.image_order
         ) FILTER (WHERE ei.id IS NOT NULL) as images
-      FROM events e
+      FROM bounds b, events e
       LEFT JOIN event_images ei ON e.id = ei.event_id
       WHERE e.is_active = true
-        AND (
-          (e.date_month = $1 AND e.date_day >= $2)
-          OR e.date_month > $1
-        )
-      GROUP BY e.id
-      ORDER BY e.date_month, e.date_day
-      LIMIT $3
-    `, [currentMonth, currentDay, days]);
+        AND ${range}
+      GROUP BY e.id, b.start_day
+      ORDER BY e.day_of_year < b.start_day, e.day_of_year
+    `, [today.getMonth() + 1, today.getDate(), lastDay.getMonth() + 1, lastDay.getDate()]);
         res.json({
             success: true,
             data: result.rows,
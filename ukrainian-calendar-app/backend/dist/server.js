@@ -32,6 +32,17 @@ const limiter = (0, express_rate_limit_1.default)({
 app.use('/api/', limiter);
 // Static files (для зображень)
 app.use('/uploads', express_1.default.static('uploads'));
+// Статичні знімки календаря (database/export_snapshot.py) - без запитів до БД.
+// Шарди вже стиснені gzip, клієнт перевіряє їх за ETag.
+app.use('/snapshots', express_1.default.static(process.env.SNAPSHOT_DIR || '../snapshots', {
+    setHeaders: (res, filePath) => {
+        res.setHeader('Cache-Control', 'no-cache');
+        if (filePath.endsWith('.json.gz')) {
+            res.setHeader('Content-Encoding', 'gzip');
+            res.setHeader('Content-Type', 'application/json; charset=utf-8');
+        }
+    }
+}));
 // Routes
 app.use('/api/events', events_1.default);
 app.use('/api/notifications', notifications_1.default);
@@ -49,6 +60,7 @@ app.get('/', (req, res) => {
             events: '/api/events',
             notifications: '/api/notifications',
             admin: '/api/admin',
+            snapshots: '/snapshots/manifest.json',
             health: '/health'
         }
     });
@@ -57,24 +57,29 @@ const sendPushNotification = async (fcmToken, title, body, data) => {
 exports.sendPushNotification = sendPushNotification;
 /**
  * Відправка нотифікації всім активним пристроям
+ * (або лише тим, у яких час нотифікацій припадає на слот)
  */
-const sendNotificationToAll = async (title, body, data) => {
+const sendNotificationToAll = async (title, body, data, scheduled) => {
     if (!isFirebaseInitialized) {
         return { success: 0, failed: 0 };
     }
     try {
-        // Отримуємо всі активні токени з увімкненими нотифікаціями
+        // Отримуємо активні токени з увімкненими нотифікаціями
+        const slotFilter = scheduled
+            ? 'AND FLOOR(EXTRACT(EPOCH FROM up.notification_time) / 60 / $1) = $2'
+            : '';
         const result = await database_1.default.query(`
       SELECT dt.fcm_token
       FROM device_tokens dt
       JOIN user_preferences up ON dt.id = up.device_token_id
       WHERE dt.is_active = true
         AND up.notifications_enabled = true
-    `);
+        ${slotFilter}
+    `, scheduled ? [scheduled.slotMinutes, scheduled.slot] : []);
         const tokens = result.rows.map((row) => row.fcm_token);
         if (tokens.length === 0) {
             console.log('No active devices with notifications enabled');
-            return { success: 0, failed: 0 };
+            return { success: 0, failed: 0, skipped: true };
         }
         // Відправляємо multicast
         const message = {
@@ -97,8 +102,14 @@ const sendNotificationToAll = async (title, body, data) => {
 exports.sendNotificationToAll = sendNotificationToAll;
 /**
  * Відправка нотифікації про подію
+ * Для запланованої нотифікації оновлюється її рядок у notifications,
+ * інакше в історію додається новий
  */
-const sendEventNotification = async (eventId) => {
+const sendEventNotification = async (eventId, scheduled) => {
+    if (scheduled && !isFirebaseInitialized) {
+        // Заплановані рядки лишаються 'pending' до налаштування Firebase
+        return;
+    }
     try {
         // Отримуємо інформацію про подію
         const eventResult = await database_1.default.query('SELECT * FROM events WHERE id = $1', [eventId]);
@@ -114,12 +125,23 @@ const sendEventNotification = async (eventId) => {
             date: `${event.date_day}.${event.date_month}`,
             type: 'event_reminder'
         };
-        const result = await (0, exports.sendNotificationToAll)(title, body, data);
+        const result = await (0, exports.sendNotificationToAll)(title, body, data, scheduled);
         // Зберігаємо в історію
-        await database_1.default.query(`
-      INSERT INTO notifications (event_id, notification_date, sent_at, status)
-      VALUES ($1, CURRENT_DATE, CURRENT_TIMESTAMP, $2)
-    `, [eventId, result.success > 0 ? 'sent' : 'failed']);
+        if (scheduled) {
+            // Слот без пристроїв позначається 'skipped', а не 'sent', щоб не
+            // потрапляти в статистику відправлених
+            await database_1.default.query(`
+        UPDATE notifications
+        SET sent_at = CURRENT_TIMESTAMP, status = $2
+        WHERE id = $1
+      `, [scheduled.notificationId, result.skipped ? 'skipped' : result.success > 0 ? 'sent' : 'failed']);
+        }
+        else {
+            await database_1.default.query(`
+        INSERT INTO notifications (event_id, notification_date, sent_at, status)
+        VALUES ($1, CURRENT_DATE, CURRENT_TIMESTAMP, $2)
+      `, [eventId, result.success > 0 ? 'sent' : 'failed']);
+        }
         console.log(`✓ Event notification sent for ${title}: ${result.success} success, ${result.failed} failed`);
     }
     catch (error) {
@@ -53,6 +53,12 @@ router.put('/events/:id', async (req, res) => {
         traditions = COALESCE($3, traditions),
         preparation = COALESCE($4, preparation),
         is_active = COALESCE($5, is_active),
+        -- Рішення адміністратора важливіше за вимкнення імпортом
+        deactivated_by_import = deactivated_by_import AND $5::boolean IS NULL,
+        -- Змінений тут вміст більше не належить імпорту (див. schema.sql)
+        content_hash = CASE
+          WHEN $1 IS NULL AND $2 IS NULL AND $3 IS NULL AND $4 IS NULL THEN content_hash
+        END,
         updated_at = CURRENT_TIMESTAMP
       WHERE id = $6
       RETURNING *
@@ -100,6 +106,7 @@ router.post('/events', async (req, res) => {
         description = EXCLUDED.description,
         traditions = EXCLUDED.traditions,
         preparation = EXCLUDED.preparation,
+        content_hash = NULL,
         updated_at = CURRENT_TIMESTAMP
       RETURNING *
     `, [dateDay, dateMonth, title, description, traditions, preparation]);
@@ -33,6 +33,18 @@ app.use('/api/', limiter);
 // Static files (для зображень)
 app.use('/uploads', express.static('uploads'));
 
+// Статичні знімки календаря (database/export_snapshot.py) - без запитів до БД.
+// Шарди вже стиснені gzip, клієнт перевіряє їх за ETag.
+app.use('/snapshots', express.static(process.env.SNAPSHOT_DIR || '../snapshots', {
+  setHeaders: (res, filePath) => {
+    res.setHeader('Cache-Control', 'no-cache');
+    if (filePath.endsWith('.json.gz')) {
+      res.setHeader('Content-Encoding', 'gzip');
+      res.setHeader('Content-Type', 'application/json; charset=utf-8');
+    }
+  }
+}));
+
 // Routes
 app.use('/api/events', eventsRouter);
 app.use('/api/notifications', notificationsRouter);
@@ -52,6 +64,7 @@ app.get('/', (req, res) => {
       events: '/api/events',
       notifications: '/api/notifications',
       admin: '/api/admin',
+      snapshots: '/snapshots/manifest.json',
       health: '/health'
     }
   });
@@ -2,48 +2,57 @@ import cron from 'node-cron';
 import pool from '../config/database';
 import { sendEventNotification } from './firebaseService';
 
+// Довжина слоту нотифікацій; має збігатися з SLOT_MINUTES у
+// database/schedule_notifications.py, який планує рядки notifications
+const SLOT_MINUTES = 30;
+
 /**
- * Cron job для відправки щоденних нотифікацій
- * Запускається щодня о 9:00
+ * Cron job для відправки нотифікацій за розкладом
+ * Запускається на початку кожного слоту (кожні 30 хвилин) і надсилає
+ * заплановані на цей слот нотифікації пристроям, у яких час нотифікацій
+ * (user_preferences.notification_time) припадає на нього
  */
 export const startDailyNotifications = () => {
-  // Запускаємо щодня о 9:00
-  cron.schedule('0 9 * * *', async () => {
-    console.log('🔔 Running daily notification job...');
+  cron.schedule(`*/${SLOT_MINUTES} * * * *`, async () => {
+    const now = new Date();
+    const slot = Math.floor((now.getHours() * 60 + now.getMinutes()) / SLOT_MINUTES);
+    const today = `${now.getFullYear()}-${now.getMonth() + 1}-${now.getDate()}`;
 
-    try {
-      const today = new Date();
-      const day = today.getDate();
-      const month = today.getMonth() + 1;
+    console.log(`🔔 Running notification job for slot ${slot}...`);
 
-      // Знаходимо події на сьогодні
+    try {
+      // Рядки слоту лежать поряд в idx_notifications_schedule
       const result = await pool.query(`
-        SELECT id, title, date_day, date_month
-        FROM events
-        WHERE date_day = $1 AND date_month = $2 AND is_active = true
-      `, [day, month]);
+        SELECT id, event_id
+        FROM notifications
+        WHERE notification_date = $1
+          AND notification_slot = $2
+          AND status = 'pending'
+      `, [today, slot]);
 
       if (result.rows.length === 0) {
-        console.log(`No events for today (${day}.${month})`);
+        console.log(`No scheduled notifications for ${today}, slot ${slot}`);
         return;
       }
 
-      console.log(`Found ${result.rows.length} event(s) for today`);
+      console.log(`Found ${result.rows.length} scheduled notification(s)`);
 
-      // Відправляємо нотифікацію для кожної події
-      for (const event of result.rows) {
-        await sendEventNotification(event.id);
-        // Затримка між нотифікаціями
-        await new Promise(resolve => setTimeout(resolve, 1000));
-      }
+      // Кожна подія - один multicast, тож події слоту надсилаються паралельно
+      await Promise.all(result.rows.map((row: { id: number; event_id: number }) =>
+        sendEventNotification(row.event_id, {
+          notificationId: row.id,
+          slot,
+          slotMinutes: SLOT_MINUTES
+        })
+      ));
 
-      console.log('✓ Daily notifications completed');
+      console.log('✓ Scheduled notifications completed');
     } catch (error) {
-      console.error('✗ Error in daily notification job:', error);
+      console.error('✗ Error in notification job:', error);
     }
   });
 
-  console.log('✓ Daily notification cron job started (runs at 9:00 AM)');
+  console.log(`✓ Notification cron job started (runs every ${SLOT_MINUTES} minutes)`);
 };
 
 /**
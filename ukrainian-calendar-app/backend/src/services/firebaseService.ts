@@ -62,33 +62,48 @@ export const sendPushNotification = async (
   }
 };
 
+/**
+ * Слот доби, на який заплановано нотифікацію
+ */
+export interface ScheduledNotification {
+  notificationId: number;
+  slot: number;
+  slotMinutes: number;
+}
+
 /**
  * Відправка нотифікації всім активним пристроям
+ * (або лише тим, у яких час нотифікацій припадає на слот)
  */
 export const sendNotificationToAll = async (
   title: string,
   body: string,
-  data?: any
-): Promise<{ success: number; failed: number }> => {
+  data?: any,
+  scheduled?: ScheduledNotification
+): Promise<{ success: number; failed: number; skipped?: boolean }> => {
   if (!isFirebaseInitialized) {
     return { success: 0, failed: 0 };
   }
 
   try {
-    // Отримуємо всі активні токени з увімкненими нотифікаціями
+    // Отримуємо активні токени з увімкненими нотифікаціями
+    const slotFilter = scheduled
+      ? 'AND FLOOR(EXTRACT(EPOCH FROM up.notification_time) / 60 / $1) = $2'
+      : '';
     const result = await pool.query(`
       SELECT dt.fcm_token
       FROM device_tokens dt
       JOIN user_preferences up ON dt.id = up.device_token_id
       WHERE dt.is_active = true
         AND up.notifications_enabled = true
-    `);
+        ${slotFilter}
+    `, scheduled ? [scheduled.slotMinutes, scheduled.slot] : []);
 
     const tokens = result.rows.map((row: { fcm_token: string }) => row.fcm_token);
 
     if (tokens.length === 0) {
       console.log('No active devices with notifications enabled');
-      return { success: 0, failed: 0 };
+      return { success: 0, failed: 0, skipped: true };
     }
 
     // Відправляємо multicast
@@ -114,8 +129,18 @@ export const sendNotificationToAll = async (
 
 /**
  * Відправка нотифікації про подію
+ * Для запланованої нотифікації оновлюється її рядок у notifications,
+ * інакше в історію додається новий
  */
-export const sendEventNotification = async (eventId: number): Promise<void> => {
+export const sendEventNotification = async (
+  eventId: number,
+  scheduled?: ScheduledNotification
+): Promise<void> => {
+  if (scheduled && !isFirebaseInitialized) {
+    // Заплановані рядки лишаються 'pending' до налаштування Firebase
+    return;
+  }
+
   try {
     // Отримуємо інформацію про подію
     const eventResult = await pool.query(
@@ -138,13 +163,23 @@ export const sendEventNotification = async (eventId: number): Promise<void> => {
       type: 'event_reminder'
     };
 
-    const result = await sendNotificationToAll(title, body, data);
+    const result = await sendNotificationToAll(title, body, data, scheduled);
 
     // Зберігаємо в історію
-    await pool.query(`
-      INSERT INTO notifications (event_id, notification_date, sent_at, status)
-      VALUES ($1, CURRENT_DATE, CURRENT_TIMESTAMP, $2)
-    `, [eventId, result.success > 0 ? 'sent' : 'failed']);
+    if (scheduled) {
+      // Слот без пристроїв позначається 'skipped', а не 'sent', щоб не
+      // потрапляти в статистику відправлених
+      await pool.query(`
+        UPDATE notifications
+        SET sent_at = CURRENT_TIMESTAMP, status = $2
+        WHERE id = $1
+      `, [scheduled.notificationId, result.skipped ? 'skipped' : result.success > 0 ? 'sent' : 'failed']);
+    } else {
+      await pool.query(`
+        INSERT INTO notifications (event_id, notification_date, sent_at, status)
+        VALUES ($1, CURRENT_DATE, CURRENT_TIMESTAMP, $2)
+      `, [eventId, result.success > 0 ? 'sent' : 'failed']);
+    }
 
     console.log(`✓ Event notification sent for ${title}: ${result.success} success, ${result.failed} failed`);
   } catch (error) {
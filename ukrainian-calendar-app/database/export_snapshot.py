@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Експорт статичних JSON-знімків календаря з PostgreSQL
+
+Дані календаря змінюються лише після import_csv.py, тому відповіді API
+можна зібрати заздалегідь. Скрипт пише gzip-шарди у форматі відповідей
+routes/events.ts:
+
+    year.json.gz          - увесь рік (як GET /api/events)
+    months/MM.json.gz     - місяць (як GET /api/events/month/:month)
+    days/MM-DD.json.gz    - день (як GET /api/events/date/:month/:day)
+    manifest.json         - хеш (etag) і розміри кожного шарда
+
+Шарди з незмінним вмістом не перезаписуються, тож статичний сервер
+віддає для них 304 за тим самим ETag.
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+
+import psycopg2
+
+from import_csv import DB_CONFIG
+# import_csv додає корінь репозиторію до sys.path
+from calendar_source import write_file_atomic, write_json_atomic  # noqa: E402
+
+SNAPSHOT_DIR = '../snapshots'
+MANIFEST_FILE = 'manifest.json'
+MANIFEST_FORMAT_VERSION = 1
+
+# Ті самі поля, що й у GET /api/events
+EVENTS_SQL = """
+    SELECT
+        e.id,
+        e.date_day,
+        e.date_month,
+        e.title,
+        e.description,
+        e.traditions,
+        e.preparation,
+        json_agg(
+            json_build_object(
+                'id', ei.id,
+                'url', ei.image_url,
+                'title', ei.image_title
+            ) ORDER BY ei.image_order
+        ) FILTER (WHERE ei.id IS NOT NULL) as images
+    FROM events e
+    LEFT JOIN event_images ei ON e.id = ei.event_id
+    WHERE e.is_active = true
+    GROUP BY e.id
+    ORDER BY e.date_month, e.date_day
+"""
+
+EVENT_KEYS = (
+    'id', 'date_day', 'date_month', 'title', 'description',
+    'traditions', 'preparation', 'images'
+)
+
+
+def fetch_events(conn):
+    """Активні події в календарному порядку"""
+    cursor = conn.cursor()
+    cursor.execute(EVENTS_SQL)
+    events = [dict(zip(EVENT_KEYS, row)) for row in cursor.fetchall()]
+    cursor.close()
+    return events
+
+
+def iter_shards(events):
+    """Пари (шлях шарда, відповідь API) для року, місяців і днів"""
+    yield 'year.json.gz', {'success': True, 'data': events, 'count': len(events)}
+
+    by_month = {month: [] for month in range(1, 13)}
+    for event in events:
+        by_month[event['date_month']].append(event)
+
+    for month, month_events in by_month.items():
+        yield f'months/{month:02d}.json.gz', {
+            'success': True, 'data': month_events, 'count': len(month_events)
+        }
+
+    for event in events:
+        yield f"days/{event['date_month']:02d}-{event['date_day']:02d}.json.gz", {
+            'success': True, 'data': event
+        }
+
+
+def encode_shard(payload):
+    """Повертає (json-байти, gzip-байти); mtime=0 робить gzip детермінованим"""
+    body = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return body, gzip.compress(body, compresslevel=9, mtime=0)
+
+
+def content_etag(body):
+    return hashlib.sha256(body).hexdigest()[:32]
+
+
+def load_manifest(snapshot_dir):
+    try:
+        with open(os.path.join(snapshot_dir, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+    if manifest.get('version') != MANIFEST_FORMAT_VERSION:
+        return {}
+    return manifest.get('shards', {})
+
+
+def export_snapshot(conn, snapshot_dir=SNAPSHOT_DIR):
+    """Пише шарди й маніфест; повертає (записано, без змін, видалено)"""
+    events = fetch_events(conn)
+    previous = load_manifest(snapshot_dir)
+
+    shards = {}
+    written = unchanged = 0
+    for name, payload in iter_shards(events):
+        body, compressed = encode_shard(payload)
+        etag = content_etag(body)
+        path = os.path.join(snapshot_dir, name)
+
+        if previous.get(name, {}).get('etag') == etag and os.path.exists(path):
+            unchanged += 1
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            write_file_atomic(path, compressed)
+            written += 1
+
+        shards[name] = {
+            'etag': etag,
+            'size': len(body),
+            'gzip_size': len(compressed),
+        }
+
+    # Дні, яких більше немає в календарі
+    removed = 0
+    for name in previous.keys() - shards.keys():
+        try:
+            os.remove(os.path.join(snapshot_dir, name))
+            removed += 1
+        except OSError:
+            pass
+
+    manifest = {
+        'version': MANIFEST_FORMAT_VERSION,
+        'generated_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'etag': content_etag(''.join(
+            f"{name}:{shard['etag']}" for name, shard in sorted(shards.items())
+        ).encode('utf-8')),
+        'count': len(events),
+        'shards': shards,
+    }
+    os.makedirs(snapshot_dir, exist_ok=True)
+    write_json_atomic(os.path.join(snapshot_dir, MANIFEST_FILE), manifest, indent=2)
+
+    return written, unchanged, removed
+
+
+def print_export_summary(snapshot_dir, written, unchanged, removed):
+    print(f"✓ Знімки календаря в {snapshot_dir}:")
+    print(f"  Записано шардів: {written}")
+    print(f"  Без змін: {unchanged}")
+    if removed:
+        print(f"  Видалено застарілих: {removed}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Експорт статичних JSON-знімків календаря')
+    parser.add_argument(
+        '--output', default=SNAPSHOT_DIR,
+        help=f'каталог для знімків (типово: {SNAPSHOT_DIR})'
+    )
+    args = parser.parse_args()
+
+    try:
+        conn = psycopg2.connect(**DB_CONFIG)
+    except Exception as e:
+        print(f"✗ Помилка підключення до БД: {e}")
+        exit(1)
+
+    try:
+        written, unchanged, removed = export_snapshot(conn, args.output)
+        print_export_summary(args.output, written, unchanged, removed)
+    except Exception as e:
+        print(f"✗ Помилка експорту знімків: {e}")
+        exit(1)
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -4,10 +4,22 @@
 Скрипт для імпорту CSV даних в PostgreSQL
 """
 
+import argparse
 import csv
-import psycopg2
-from psycopg2.extras import execute_values
+import hashlib
+import io
 import os
+import sys
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# Спільний індекс днів календаря лежить у корені репозиторію
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, REPO_ROOT)
+
+from calendar_dates import parse_year_range  # noqa: E402
+from calendar_source import day_of_year, iter_source_rows  # noqa: E402
+from movable_feasts import MOVABLE_FEASTS, iter_feast_dates  # noqa: E402
 
 # Налаштування підключення до БД
 DB_CONFIG = {
@@ -19,14 +31,25 @@ DB_CONFIG = {
 }
 
 CSV_FILE = '../ukrainian_pagan_calendar_FINAL.csv'
+SCHEMA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'schema.sql')
+
+# Роки, на які імпортуються дати рухомих свят
+FEAST_YEARS = (2024, 2035)
+
+
+def connect_db(max_connections=1):
+    """Пул підключень до PostgreSQL
 
+    Усі кроки імпорту беруть з'єднання з пулу; паралельне завантаження
+    файлів використовує по одному з'єднанню на потік.
+    """
+    # Драйвер імпортується тут, щоб --search працював і без psycopg2
+    from psycopg2.pool import ThreadedConnectionPool
 
-def connect_db():
-    """Підключення до PostgreSQL"""
     try:
-        conn = psycopg2.connect(**DB_CONFIG)
+        pool = ThreadedConnectionPool(1, max_connections, **DB_CONFIG)
         print(f"✓ Підключено до БД {DB_CONFIG['database']}")
-        return conn
+        return pool
     except Exception as e:
         print(f"✗ Помилка підключення до БД: {e}")
         exit(1)
@@ -34,6 +57,8 @@ def connect_db():
 
 def create_database_if_not_exists():
     """Створює базу даних якщо вона не існує"""
+    import psycopg2
+
     try:
         # Підключаємось до postgres БД для створення нашої БД
         conn = psycopg2.connect(
@@ -68,7 +93,7 @@ def create_database_if_not_exists():
 def create_schema(conn):
     """Створює схему БД"""
     try:
-        with open('schema.sql', 'r', encoding='utf-8') as f:
+        with open(SCHEMA_FILE, 'r', encoding='utf-8') as f:
             schema_sql = f.read()
 
         cursor = conn.cursor()
@@ -81,63 +106,327 @@ def create_schema(conn):
         conn.rollback()
 
 
-def import_csv_data(conn):
-    """Імпортує дані з CSV"""
+class CsvRowStream:
+    """Файлоподібний об'єкт для COPY FROM STDIN
+
+    Рядки CSV формуються на льоту з ітератора кортежів, тому весь файл
+    ніколи не тримається в пам'яті.
+    """
+
+    def __init__(self, rows):
+        self._rows = iter(rows)
+        self._out = io.StringIO()
+        self._writer = csv.writer(self._out, lineterminator='\n')
+        self._buffer = ''
+        self.count = 0
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            row = next(self._rows, None)
+            if row is None:
+                break
+            self._writer.writerow(row)
+            self.count += 1
+            if self._out.tell() >= 65536:
+                self._drain()
+        self._drain()
+
+        if size < 0:
+            size = len(self._buffer)
+        chunk, self._buffer = self._buffer[:size], self._buffer[size:]
+        return chunk
+
+    def _drain(self):
+        self._buffer += self._out.getvalue()
+        self._out.seek(0)
+        self._out.truncate()
+
+
+# Роздільник полів для хешу; та сама формула використовується в schema.sql
+HASH_SEPARATOR = '\x1f'
+
+
+def row_content_hash(fields):
+    """md5 полів події (назва, опис, традиції, як підготуватися)"""
+    return hashlib.md5(HASH_SEPARATOR.join(fields).encode('utf-8')).hexdigest()
+
+
+def iter_event_rows(csv_path):
+    """Рядки для таблиці events у порядку CSV разом із хешем вмісту"""
+    return build_event_rows(iter_source_rows(csv_path))
+
+
+def build_event_rows(records):
+    """Рядки для таблиці events із записів (день, місяць, поля) у тому ж порядку
+
+    Номер дня року (events.day_of_year) рахує сама база.
+    """
+    for day, month, (title, description, traditions, preparation) in records:
+        # Якщо немає назви, генеруємо з дати
+        if not title:
+            title = f"День {day:02d}.{month:02d}"
+        fields = (title, description, traditions, preparation)
+        yield (day, month) + fields + (row_content_hash(fields),)
+
+
+TEXT_COLUMNS = 'title, description, traditions, preparation'
+EVENT_COLUMNS = f'date_day, date_month, {TEXT_COLUMNS}'
+STAGING_COLUMNS = f'{EVENT_COLUMNS}, content_hash'
+
+# Звичайна (не тимчасова) таблиця: її заповнюють кілька з'єднань одночасно.
+# UNLOGGED, бо дані проміжні й після імпорту таблиця видаляється.
+CREATE_STAGING_SQL = """
+    CREATE UNLOGGED TABLE {staging} (
+        source_priority INTEGER NOT NULL,
+        row_no BIGSERIAL,
+        date_day INTEGER NOT NULL,
+        date_month INTEGER NOT NULL,
+        title VARCHAR(255) NOT NULL,
+        description TEXT,
+        traditions TEXT,
+        preparation TEXT,
+        content_hash CHAR(32) NOT NULL
+    )
+"""
+
+# Один запит порівнює хеші й застосовує дельту:
+#   нові дні вставляються, дні зі зміненим хешем (або вимкнені попереднім
+#   імпортом) оновлюються, дні, яких немає в жодному CSV, вимикаються з
+#   позначкою deactivated_by_import, решта не чіпається - тож updated_at
+#   змінюється лише там, де змінився вміст. Знову вмикаються лише дні,
+#   які вимкнув сам імпорт: вимкнені в адмін-панелі лишаються вимкненими.
+#   Вимикаються лише події, які востаннє записав імпорт (content_hash не
+#   NULL): створені в адмін-панелі дні поза CSV лишаються видимими.
+# Конфлікт між файлами вирішує пріоритет джерела (0 - найвищий), а в
+# межах одного файлу перемагає останній рядок.
+MERGE_DELTA_SQL = f"""
+    WITH incoming AS (
+        SELECT DISTINCT ON (date_day, date_month) {STAGING_COLUMNS}
+        FROM {{staging}}
+        ORDER BY date_day, date_month, source_priority, row_no DESC
+    ),
+    upserted AS (
+        INSERT INTO events AS e ({STAGING_COLUMNS}, is_active)
+        SELECT {STAGING_COLUMNS}, TRUE FROM incoming
+        ON CONFLICT (date_day, date_month)
+        DO UPDATE SET
+            title = EXCLUDED.title,
+            description = EXCLUDED.description,
+            traditions = EXCLUDED.traditions,
+            preparation = EXCLUDED.preparation,
+            content_hash = EXCLUDED.content_hash,
+            is_active = e.is_active OR e.deactivated_by_import,
+            deactivated_by_import = FALSE
+        WHERE e.content_hash IS DISTINCT FROM EXCLUDED.content_hash
+            OR e.deactivated_by_import
+        RETURNING (xmax = 0) AS inserted
+    ),
+    deactivated AS (
+        UPDATE events AS e
+        SET is_active = FALSE, deactivated_by_import = TRUE
+        WHERE e.is_active
+            AND e.content_hash IS NOT NULL
+            AND NOT EXISTS (
+                SELECT 1 FROM incoming i
+                WHERE i.date_day = e.date_day AND i.date_month = e.date_month
+            )
+        RETURNING 1
+    )
+    SELECT
+        (SELECT COUNT(*) FROM incoming),
+        (SELECT COUNT(*) FROM upserted WHERE inserted),
+        (SELECT COUNT(*) FROM upserted WHERE NOT inserted),
+        (SELECT COUNT(*) FROM deactivated),
+        (SELECT COUNT(*) FROM (
+            SELECT 1 FROM {{staging}}
+            GROUP BY date_day, date_month
+            HAVING COUNT(DISTINCT source_priority) > 1
+        ) AS conflicts)
+"""
+
+
+def load_source_rows(pool, staging, event_rows, priority):
+    """Потоково завантажує рядки одного джерела у проміжну таблицю на власному з'єднанні"""
+    conn = pool.getconn()
     try:
         cursor = conn.cursor()
+        rows = ((priority,) + row for row in event_rows)
+        stream = CsvRowStream(rows)
+        # Без FORCE_NOT_NULL COPY читає порожнє поле як NULL, а імпорт
+        # зберігає '' (саме так поля й хешуються в row_content_hash)
+        cursor.copy_expert(
+            f"COPY {staging} (source_priority, {STAGING_COLUMNS}) "
+            f"FROM STDIN WITH (FORMAT csv, FORCE_NOT_NULL ({TEXT_COLUMNS}))",
+            stream
+        )
+        conn.commit()
+        cursor.close()
+        return stream.count
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        pool.putconn(conn)
 
-        # Читаємо CSV
-        events_data = []
-        with open(CSV_FILE, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                date = row['Дата'].strip()
-                if not date or '.' not in date:
-                    continue
-
-                try:
-                    day, month = date.split('.')
-                    day = int(day)
-                    month = int(month)
-
-                    title = row.get('Подія', '').strip()
-                    description = row.get('Опис', '').strip()
-                    traditions = row.get('Традиції', '').strip()
-                    preparation = row.get('Як підготуватися', '').strip()
-
-                    # Якщо немає назви, генеруємо з дати
-                    if not title:
-                        title = f"День {day:02d}.{month:02d}"
-
-                    events_data.append((
-                        day, month, title, description, traditions, preparation
-                    ))
-                except ValueError:
-                    continue
-
-        # Вставляємо дані
-        if events_data:
-            insert_query = """
-                INSERT INTO events (date_day, date_month, title, description, traditions, preparation)
-                VALUES %s
-                ON CONFLICT (date_day, date_month)
-                DO UPDATE SET
-                    title = EXCLUDED.title,
-                    description = EXCLUDED.description,
-                    traditions = EXCLUDED.traditions,
-                    preparation = EXCLUDED.preparation,
-                    updated_at = CURRENT_TIMESTAMP
-            """
-            execute_values(cursor, insert_query, events_data)
-            conn.commit()
-            print(f"✓ Імпортовано {len(events_data)} подій")
-        else:
+
+def import_csv_data(pool, csv_files, workers=1):
+    """Імпортує дані з одного або кількох CSV як дельту за хешами рядків
+
+    Файли перелічені в порядку пріоритету: якщо день є в кількох файлах,
+    береться запис з першого.
+    """
+    return import_event_rows(
+        pool, [(csv_path, iter_event_rows(csv_path)) for csv_path in csv_files], workers
+    )
+
+
+def import_event_rows(pool, sources, workers=1):
+    """Імпортує рядки з кількох джерел як дельту за хешами рядків
+
+    sources - пари (назва, рядки з build_event_rows) в порядку пріоритету.
+    Рядки кожного джерела потоково передаються через COPY у спільну
+    проміжну таблицю на окремому з'єднанні пулу, після чого один запит
+    вставляє, оновлює, вимикає або пропускає кожен день.
+
+    Повертає True, якщо дельту застосовано.
+    """
+    staging = f"events_staging_{uuid.uuid4().hex[:12]}"
+    conn = pool.getconn()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(CREATE_STAGING_SQL.format(staging=staging))
+        conn.commit()
+
+        # Завантажуємо файли паралельно
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(load_source_rows, pool, staging, event_rows, priority)
+                for priority, (_, event_rows) in enumerate(sources)
+            ]
+            counts = [future.result() for future in futures]
+
+        for priority, ((name, _), count) in enumerate(zip(sources, counts)):
+            print(f"✓ [{priority}] {name}: {count} рядків")
+
+        if not sum(counts):
+            # Порожні CSV не повинні вимикати всі події
             print("⚠ Немає даних для імпорту")
+            return False
+
+        cursor.execute(MERGE_DELTA_SQL.format(staging=staging))
+        days, inserted, updated, deactivated, conflicts = cursor.fetchone()
+        conn.commit()
+
+        unchanged = days - inserted - updated
+        print(f"✓ Прочитано {sum(counts)} рядків ({days} днів)")
+        if len(sources) > 1:
+            print(f"✓ Днів у кількох джерелах (за пріоритетом): {conflicts}")
+        print("✓ Дельта імпорту:")
+        print(f"  Нових: {inserted}")
+        print(f"  Оновлено: {updated}")
+        print(f"  Вимкнено: {deactivated}")
+        print(f"  Без змін: {unchanged}")
 
         cursor.close()
+        return True
     except Exception as e:
         print(f"✗ Помилка імпорту CSV: {e}")
         conn.rollback()
+        return False
+    finally:
+        try:
+            cursor = conn.cursor()
+            cursor.execute(f"DROP TABLE IF EXISTS {staging}")
+            conn.commit()
+            cursor.close()
+        except Exception as e:
+            print(f"⚠ Не вдалося видалити {staging}: {e}")
+        pool.putconn(conn)
+
+
+UPSERT_FEASTS_SQL = """
+    INSERT INTO movable_feasts (feast_key, title, easter_offset)
+    SELECT * FROM unnest(%s::varchar[], %s::varchar[], %s::smallint[])
+    ON CONFLICT (feast_key) DO UPDATE SET
+        title = EXCLUDED.title,
+        easter_offset = EXCLUDED.easter_offset
+"""
+
+# Дати всіх свят за всі роки передаються масивами одним запитом
+UPSERT_FEAST_DATES_SQL = """
+    WITH upserted AS (
+        INSERT INTO movable_feast_dates AS m (feast_id, year, feast_date, day_of_year)
+        SELECT f.id, d.year, d.feast_date, d.day_of_year
+        FROM unnest(%s::varchar[], %s::smallint[], %s::date[], %s::smallint[])
+            AS d(feast_key, year, feast_date, day_of_year)
+        JOIN movable_feasts f USING (feast_key)
+        ON CONFLICT (feast_id, year) DO UPDATE SET
+            feast_date = EXCLUDED.feast_date,
+            day_of_year = EXCLUDED.day_of_year
+        WHERE m.feast_date IS DISTINCT FROM EXCLUDED.feast_date
+        RETURNING 1
+    )
+    SELECT COUNT(*) FROM upserted
+"""
+
+
+def import_movable_feasts(conn, first_year, last_year):
+    """Записує рухомі свята та їхні дати на роки first_year..last_year
+
+    Дати беруться з кешованої таблиці Великодня (movable_feasts.py), тож
+    для кожного свята й року - лише пошук у таблиці.
+    """
+    try:
+        cursor = conn.cursor()
+        cursor.execute(UPSERT_FEASTS_SQL, (
+            [feast.key for feast in MOVABLE_FEASTS],
+            [feast.title for feast in MOVABLE_FEASTS],
+            [feast.offset for feast in MOVABLE_FEASTS],
+        ))
+
+        columns = ([], [], [], [])
+        for year, feast, date in iter_feast_dates(first_year, last_year):
+            for column, value in zip(columns, (
+                feast.key, year, date, day_of_year(date.day, date.month) + 1
+            )):
+                column.append(value)
+
+        cursor.execute(UPSERT_FEAST_DATES_SQL, columns)
+        changed = cursor.fetchone()[0]
+        conn.commit()
+        cursor.close()
+
+        print(f"✓ Рухомі свята на {first_year}-{last_year} роки: "
+              f"{len(columns[0])} дат, змінено {changed}")
+    except Exception as e:
+        print(f"✗ Помилка імпорту рухомих свят: {e}")
+        conn.rollback()
+
+
+# Відбиток того, що записує імпорт: вміст і стан подій та дати рухомих свят
+DATABASE_DIGEST_SQL = """
+    SELECT md5(concat_ws('|',
+        (SELECT string_agg(
+            concat_ws(',', date_day, date_month, content_hash, is_active, deactivated_by_import),
+            ';' ORDER BY date_month, date_day)
+         FROM events),
+        (SELECT string_agg(
+            concat_ws(',', f.feast_key, d.year, d.feast_date),
+            ';' ORDER BY f.feast_key, d.year)
+         FROM movable_feast_dates d JOIN movable_feasts f ON f.id = d.feast_id)
+    ))
+"""
+
+
+def database_digest(conn):
+    """md5 даних календаря в БД; змінюється після будь-якого імпорту зі змінами"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(DATABASE_DIGEST_SQL)
+        return cursor.fetchone()[0]
+    finally:
+        conn.rollback()
+        cursor.close()
 
 
 def verify_import(conn):
@@ -159,6 +448,16 @@ def verify_import(conn):
         filled = cursor.fetchone()[0]
         print(f"  Заповнених подій: {filled}")
 
+        # Порожні поля з CSV мають зберігатися як '', а не NULL
+        cursor.execute("""
+            SELECT COUNT(*) FROM events
+            WHERE content_hash IS NOT NULL
+                AND (description IS NULL OR traditions IS NULL OR preparation IS NULL)
+        """)
+        null_fields = cursor.fetchone()[0]
+        if null_fields:
+            print(f"  ⚠ Подій з NULL замість порожнього поля: {null_fields}")
+
         # Приклади подій
         cursor.execute("""
             SELECT date_day, date_month, title
@@ -178,7 +477,43 @@ def verify_import(conn):
         print(f"✗ Помилка перевірки: {e}")
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description='Імпорт CSV календаря в PostgreSQL')
+    parser.add_argument(
+        'csv_files', nargs='*', default=[CSV_FILE], metavar='CSV',
+        help='CSV-файли в порядку пріоритету: при конфлікті дат перемагає '
+             f'раніший файл (типово: {CSV_FILE})'
+    )
+    parser.add_argument(
+        '--workers', type=int, default=4,
+        help="кількість файлів, що завантажуються паралельно (типово: 4)"
+    )
+    parser.add_argument(
+        '--snapshot-dir', metavar='DIR',
+        help='після імпорту оновити статичні JSON-знімки (див. export_snapshot.py)'
+    )
+    parser.add_argument(
+        '--feast-years', type=parse_year_range, default=FEAST_YEARS, metavar='РРРР-РРРР',
+        help='роки, на які імпортуються дати рухомих свят '
+             f'(типово: {FEAST_YEARS[0]}-{FEAST_YEARS[1]})'
+    )
+    parser.add_argument(
+        '--search', metavar='QUERY',
+        help='офлайн-пошук у extracted_events.json без підключення до БД'
+    )
+    return parser.parse_args()
+
+
 def main():
+    args = parse_args()
+
+    if args.search:
+        from offline_search import print_offline_search
+        print_offline_search(args.search)
+        return
+
+    workers = max(1, min(args.workers, len(args.csv_files)))
+
     print("=" * 60)
     print("📥 Імпорт даних в PostgreSQL")
     print("=" * 60)
@@ -187,20 +522,44 @@ def main():
     # Створюємо БД якщо не існує
     create_database_if_not_exists()
 
-    # Підключаємось
-    conn = connect_db()
+    # Підключаємось: одне з'єднання на потік плюс одне для злиття
+    pool = connect_db(max_connections=workers + 1)
 
     # Створюємо схему
+    conn = pool.getconn()
     create_schema(conn)
+    pool.putconn(conn)
 
     # Імпортуємо дані
-    import_csv_data(conn)
+    import_csv_data(pool, args.csv_files, workers)
 
     # Перевіряємо
+    conn = pool.getconn()
+    import_movable_feasts(conn, *args.feast_years)
     verify_import(conn)
 
+    # Оновлюємо статичні знімки для мобільного застосунку
+    if args.snapshot_dir:
+        from export_snapshot import export_snapshot, print_export_summary
+        try:
+            result = export_snapshot(conn, args.snapshot_dir)
+            print()
+            print_export_summary(args.snapshot_dir, *result)
+        except Exception as e:
+            print(f"✗ Помилка експорту знімків: {e}")
+
+    # Розклад нотифікацій на рік наперед для оновлених подій
+    from schedule_notifications import schedule_notifications, print_schedule_summary
+    try:
+        result = schedule_notifications(conn)
+        print()
+        print_schedule_summary(*result)
+    except Exception as e:
+        print(f"✗ Помилка планування нотифікацій: {e}")
+    pool.putconn(conn)
+
     # Закриваємо з'єднання
-    conn.close()
+    pool.closeall()
 
     print()
     print("=" * 60)
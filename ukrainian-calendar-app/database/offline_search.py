@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Офлайн-пошук у extracted_events.json для редакторів без доступу до БД
+
+Не потребує psycopg2; запускається як import_csv.py --search "запит"
+або напряму: python3 offline_search.py "запит"
+"""
+
+import bisect
+import json
+import os
+import re
+import sys
+import unicodedata
+from collections import defaultdict
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, REPO_ROOT)
+
+from calendar_source import source_stamp, write_cache_json  # noqa: E402
+from passage_store import read_extracted_json  # noqa: E402
+
+EXTRACTED_EVENTS_JSON = os.path.join(REPO_ROOT, 'extracted_events.json')
+SEARCH_INDEX_FILE = os.path.join(REPO_ROOT, 'extracted_events.search.json')
+SEARCH_INDEX_VERSION = 1
+
+# Слова так само, як у конфігурації ukrainian_unaccent: послідовності
+# букв і цифр, апостроф і дефіс розділяють слова, без стемінгу
+WORD_PATTERN = re.compile(r'[^\W_]+')
+
+# Вага збігу в назві події проти збігу в контексті (як 'A' проти 'B')
+NAME_WEIGHT = 4
+
+
+def normalize_search_text(text):
+    """Нижній регістр без окремих діакритичних знаків (наголосів)
+
+    Складені літери й, ї, ґ лишаються, як і в ukrainian_unaccent.
+    """
+    text = unicodedata.normalize('NFC', text.lower())
+    return ''.join(ch for ch in text if unicodedata.category(ch) != 'Mn')
+
+
+def tokenize(text):
+    return WORD_PATTERN.findall(normalize_search_text(text))
+
+
+def build_search_index(events_path=EXTRACTED_EVENTS_JSON):
+    """Інвертований індекс над extracted_events.json
+
+    Документ - одна знахідка (дата, назва події, джерело); для кожного слова
+    зберігається список [документ, вага], де вага враховує збіги в назві
+    з коефіцієнтом NAME_WEIGHT.
+    """
+    events_by_date = read_extracted_json(events_path)
+
+    documents = []
+    postings = defaultdict(list)
+    context_terms = {}
+    for date_str, events in events_by_date.items():
+        for event in events:
+            doc_id = len(documents)
+            documents.append([date_str, event.get('event_name', ''), event.get('source_file', '')])
+
+            # Спільний уривок розбивається на слова один раз
+            context = event.get('context') or ''
+            key = event.get('passage_id', context)
+            if key not in context_terms:
+                context_terms[key] = tokenize(context)
+
+            weights = defaultdict(int)
+            for term in tokenize(event.get('event_name') or ''):
+                weights[term] += NAME_WEIGHT
+            for term in context_terms[key]:
+                weights[term] += 1
+            for term, weight in weights.items():
+                postings[term].append([doc_id, weight])
+
+    return {
+        'version': SEARCH_INDEX_VERSION,
+        'documents': documents,
+        'terms': dict(sorted(postings.items())),
+    }
+
+
+def load_search_index(events_path=EXTRACTED_EVENTS_JSON, index_path=SEARCH_INDEX_FILE):
+    """Читає збережений індекс або перебудовує його, якщо джерело змінилося"""
+    stamp = source_stamp(events_path)
+
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        if index.get('version') == SEARCH_INDEX_VERSION and index.get('source') == stamp:
+            return index
+    except (OSError, ValueError):
+        pass
+
+    index = build_search_index(events_path)
+    index['source'] = stamp
+    if write_cache_json(index_path, index):
+        print(f"✓ Індекс пошуку збережено: {index_path}")
+    return index
+
+
+def search_offline(index, query):
+    """Пошук як to_tsquery('слово1:* & слово2:*')
+
+    Кожне слово запиту шукається як префікс ("купал" знаходить "купала",
+    "купало"), документ має містити всі слова. Повертає [(вага, документ)]
+    від найкращого збігу.
+    """
+    query_terms = tokenize(query)
+    if not query_terms:
+        return []
+
+    # Ключі індексу відсортовані, тож префікс - суцільний діапазон словника
+    terms = index['terms']
+    vocabulary = list(terms)
+
+    scores = None
+    for query_term in query_terms:
+        term_scores = defaultdict(int)
+        start = bisect.bisect_left(vocabulary, query_term)
+        for term in vocabulary[start:]:
+            if not term.startswith(query_term):
+                break
+            for doc_id, weight in terms[term]:
+                term_scores[doc_id] += weight
+
+        if scores is None:
+            scores = term_scores
+        else:
+            scores = {doc_id: score + term_scores[doc_id]
+                      for doc_id, score in scores.items() if doc_id in term_scores}
+        if not scores:
+            return []
+
+    ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+    return [(score, index['documents'][doc_id]) for doc_id, score in ranked]
+
+
+def print_offline_search(query, limit=20):
+    try:
+        index = load_search_index()
+    except (OSError, ValueError) as e:
+        print(f"✗ Помилка читання {EXTRACTED_EVENTS_JSON}: {e}")
+        return
+
+    results = search_offline(index, query)
+    print(f"🔎 \"{query}\": знайдено {len(results)}")
+    for score, (date_str, event_name, source_file) in results[:limit]:
+        print(f"  {date_str} - {event_name or '(без назви)'} [{source_file}] ({score})")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 2:
+        print('Використання: python3 offline_search.py "запит"')
+        sys.exit(1)
+    print_offline_search(sys.argv[1])
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Планування нотифікацій про події на рік наперед
+
+Для кожного дня й кожного слоту часу (SLOT_MINUTES хвилин) створюється
+рядок notifications зі статусом 'pending'. Cron у бекенді (cronService.ts)
+раз на слот бере рядки поточного слоту одним проходом індексу
+idx_notifications_schedule і надсилає їх пристроям, у яких
+user_preferences.notification_time припадає на цей слот. Рядок слоту, на
+який не припав жоден пристрій, отримує статус 'skipped', а не 'sent'.
+
+Усі рядки пишуться одним запитом; повторний запуск не дублює вже
+запланованих нотифікацій і прибирає заплановані для вимкнених подій.
+"""
+
+import argparse
+from datetime import date
+
+import psycopg2
+
+from import_csv import DB_CONFIG
+
+# Довжина слоту; має збігатися з SLOT_MINUTES у cronService.ts
+SLOT_MINUTES = 30
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+
+SCHEDULE_DAYS = 365
+
+SCHEDULE_SQL = """
+    WITH days AS (
+        SELECT day::date AS notification_date
+        FROM generate_series(
+            %(start)s::date, %(start)s::date + %(days)s - 1, interval '1 day'
+        ) AS day
+    ),
+    pruned AS (
+        DELETE FROM notifications n
+        USING events e
+        WHERE n.event_id = e.id
+            AND e.is_active IS NOT TRUE
+            AND n.status = 'pending'
+            AND n.notification_slot IS NOT NULL
+            AND n.notification_date >= %(start)s::date
+        RETURNING 1
+    ),
+    scheduled AS (
+        INSERT INTO notifications (event_id, notification_date, notification_slot, status)
+        SELECT e.id, d.notification_date, s.slot, 'pending'
+        FROM days d
+        JOIN events e
+            ON e.is_active
+            AND e.date_month = EXTRACT(MONTH FROM d.notification_date)
+            AND e.date_day = EXTRACT(DAY FROM d.notification_date)
+        CROSS JOIN generate_series(0, %(slots)s - 1) AS s(slot)
+        ORDER BY d.notification_date, s.slot, e.id
+        ON CONFLICT (notification_date, notification_slot, event_id)
+            WHERE notification_slot IS NOT NULL
+            DO NOTHING
+        RETURNING 1
+    )
+    SELECT
+        (SELECT COUNT(*) FROM days),
+        (SELECT COUNT(*) FROM scheduled),
+        (SELECT COUNT(*) FROM pruned)
+"""
+
+
+def schedule_notifications(conn, start=None, days=SCHEDULE_DAYS):
+    """Планує нотифікації на days днів від start; повертає (днів, нових, прибрано)"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(SCHEDULE_SQL, {
+            'start': start or date.today(),
+            'days': days,
+            'slots': SLOTS_PER_DAY,
+        })
+        result = cursor.fetchone()
+        conn.commit()
+        return result
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def print_schedule_summary(days, scheduled, pruned):
+    print(f"✓ Нотифікації заплановано на {days} днів ({SLOTS_PER_DAY} слотів по {SLOT_MINUTES} хв):")
+    print(f"  Нових: {scheduled}")
+    if pruned:
+        print(f"  Прибрано для вимкнених подій: {pruned}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Планування нотифікацій про події')
+    parser.add_argument(
+        '--start', type=date.fromisoformat, metavar='РРРР-ММ-ДД',
+        help='перший день розкладу (типово: сьогодні)'
+    )
+    parser.add_argument(
+        '--days', type=int, default=SCHEDULE_DAYS,
+        help=f'на скільки днів наперед (типово: {SCHEDULE_DAYS})'
+    )
+    args = parser.parse_args()
+
+    try:
+        conn = psycopg2.connect(**DB_CONFIG)
+    except Exception as e:
+        print(f"✗ Помилка підключення до БД: {e}")
+        exit(1)
+
+    try:
+        print_schedule_summary(*schedule_notifications(conn, args.start, args.days))
+    except Exception as e:
+        print(f"✗ Помилка планування нотифікацій: {e}")
+        exit(1)
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
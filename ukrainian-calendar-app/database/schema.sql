@@ -1,6 +1,24 @@
 -- PostgreSQL Schema for Ukrainian Calendar App
 -- Схема бази даних для Українського Календаря
 
+-- Конфігурація повнотекстового пошуку: слова без стемінгу (simple), з
+-- попереднім зняттям діакритики через unaccent, якщо розширення встановлене.
+-- Якщо unaccent недоступний, конфігурація лишається копією simple.
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'ukrainian_unaccent') THEN
+        CREATE TEXT SEARCH CONFIGURATION ukrainian_unaccent (COPY = simple);
+        BEGIN
+            CREATE EXTENSION IF NOT EXISTS unaccent;
+            ALTER TEXT SEARCH CONFIGURATION ukrainian_unaccent
+                ALTER MAPPING FOR hword, hword_part, word WITH unaccent, simple;
+        EXCEPTION WHEN OTHERS THEN
+            RAISE NOTICE 'unaccent недоступний, пошук працює без зняття діакритики';
+        END;
+    END IF;
+END
+$$;
+
 -- Таблиця подій (свят)
 CREATE TABLE IF NOT EXISTS events (
     id SERIAL PRIMARY KEY,
@@ -10,7 +28,28 @@ CREATE TABLE IF NOT EXISTS events (
     description TEXT,
     traditions TEXT,
     preparation TEXT,
+    -- День за високосним роком (29.02 = 60, 1.03 завжди 61); рахується самою
+    -- базою, тож його мають і події, створені поза import_csv.py
+    day_of_year SMALLINT GENERATED ALWAYS AS ((
+        CASE date_month
+            WHEN 1 THEN 0 WHEN 2 THEN 31 WHEN 3 THEN 60 WHEN 4 THEN 91
+            WHEN 5 THEN 121 WHEN 6 THEN 152 WHEN 7 THEN 182 WHEN 8 THEN 213
+            WHEN 9 THEN 244 WHEN 10 THEN 274 WHEN 11 THEN 305 WHEN 12 THEN 335
+        END + date_day
+    )::smallint) STORED CHECK (day_of_year >= 1 AND day_of_year <= 366),
     is_active BOOLEAN DEFAULT true,
+    -- Подію вимкнув import_csv.py, бо її не стало в CSV; лише такі події
+    -- імпорт вмикає знову, вимкнені адміністратором лишаються вимкненими
+    deactivated_by_import BOOLEAN NOT NULL DEFAULT false,
+    -- md5 полів події (див. import_csv.row_content_hash), якщо подію востаннє
+    -- записав імпорт; зміни з адмін-панелі скидають його в NULL, і такі
+    -- події імпорт не вимикає
+    content_hash CHAR(32),
+    search_vector TSVECTOR GENERATED ALWAYS AS (
+        setweight(to_tsvector('ukrainian_unaccent', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('ukrainian_unaccent', coalesce(description, '')), 'B') ||
+        setweight(to_tsvector('ukrainian_unaccent', coalesce(traditions, '')), 'C')
+    ) STORED,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
 
@@ -18,9 +57,66 @@ CREATE TABLE IF NOT EXISTS events (
     UNIQUE(date_day, date_month)
 );
 
+-- Міграція для баз, створених до появи content_hash: хеш заповнюється для
+-- наявних рядків тією ж формулою, що й імпорт, щоб перший повторний імпорт
+-- не переписав незмінені дні. Лише один раз, при додаванні колонки, бо
+-- NULL у content_hash означає подію з адмін-панелі
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = 'events'
+            AND column_name = 'content_hash'
+    ) THEN
+        ALTER TABLE events ADD COLUMN content_hash CHAR(32);
+        UPDATE events
+        SET content_hash = md5(concat_ws(chr(31),
+            coalesce(title, ''), coalesce(description, ''),
+            coalesce(traditions, ''), coalesce(preparation, '')));
+    END IF;
+END
+$$;
+
+-- Міграція для баз, створених до появи deactivated_by_import
+ALTER TABLE events ADD COLUMN IF NOT EXISTS deactivated_by_import BOOLEAN NOT NULL DEFAULT false;
+
+-- Міграція для баз, де day_of_year був звичайною колонкою, яку заповнював
+-- лише імпорт: звичайну колонку не можна зробити обчислюваною, тож її
+-- видаляємо (разом з індексом) і додаємо заново
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = 'events'
+            AND column_name = 'day_of_year' AND is_generated = 'NEVER'
+    ) THEN
+        ALTER TABLE events DROP COLUMN day_of_year;
+    END IF;
+END
+$$;
+
+ALTER TABLE events ADD COLUMN IF NOT EXISTS day_of_year SMALLINT GENERATED ALWAYS AS ((
+    CASE date_month
+        WHEN 1 THEN 0 WHEN 2 THEN 31 WHEN 3 THEN 60 WHEN 4 THEN 91
+        WHEN 5 THEN 121 WHEN 6 THEN 152 WHEN 7 THEN 182 WHEN 8 THEN 213
+        WHEN 9 THEN 244 WHEN 10 THEN 274 WHEN 11 THEN 305 WHEN 12 THEN 335
+    END + date_day
+)::smallint) STORED CHECK (day_of_year >= 1 AND day_of_year <= 366);
+
+-- Міграція для баз, створених до появи повнотекстового пошуку
+ALTER TABLE events ADD COLUMN IF NOT EXISTS search_vector TSVECTOR GENERATED ALWAYS AS (
+    setweight(to_tsvector('ukrainian_unaccent', coalesce(title, '')), 'A') ||
+    setweight(to_tsvector('ukrainian_unaccent', coalesce(description, '')), 'B') ||
+    setweight(to_tsvector('ukrainian_unaccent', coalesce(traditions, '')), 'C')
+) STORED;
+
 -- Індекси для швидкого пошуку
-CREATE INDEX idx_events_date ON events(date_month, date_day);
-CREATE INDEX idx_events_active ON events(is_active);
+CREATE INDEX IF NOT EXISTS idx_events_date ON events(date_month, date_day);
+CREATE INDEX IF NOT EXISTS idx_events_active ON events(is_active);
+-- Вікно найближчих днів - один або два (через кінець року) діапазони індексу
+CREATE INDEX IF NOT EXISTS idx_events_day_of_year ON events(day_of_year);
+-- Пошук за словами в назві, описі та традиціях ("Купал:*")
+CREATE INDEX IF NOT EXISTS idx_events_search ON events USING GIN(search_vector);
 
 -- Таблиця зображень подій
 CREATE TABLE IF NOT EXISTS event_images (
@@ -34,21 +130,55 @@ CREATE TABLE IF NOT EXISTS event_images (
     UNIQUE(event_id, image_order)
 );
 
-CREATE INDEX idx_event_images_event ON event_images(event_id);
+CREATE INDEX IF NOT EXISTS idx_event_images_event ON event_images(event_id);
+
+-- Рухомі свята, що відраховуються від православного Великодня
+CREATE TABLE IF NOT EXISTS movable_feasts (
+    id SERIAL PRIMARY KEY,
+    feast_key VARCHAR(50) NOT NULL UNIQUE, -- ключ з movable_feasts.py
+    title VARCHAR(255) NOT NULL,
+    easter_offset SMALLINT NOT NULL, -- днів від Великодньої неділі
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Дати рухомих свят за роками (заповнює import_csv.py з таблиці Великодня)
+CREATE TABLE IF NOT EXISTS movable_feast_dates (
+    feast_id INTEGER NOT NULL REFERENCES movable_feasts(id) ON DELETE CASCADE,
+    year SMALLINT NOT NULL,
+    feast_date DATE NOT NULL,
+    day_of_year SMALLINT NOT NULL CHECK (day_of_year >= 1 AND day_of_year <= 366), -- як у events
+
+    PRIMARY KEY (feast_id, year)
+);
+
+-- Свята на день чи вікно днів конкретного року
+CREATE INDEX IF NOT EXISTS idx_movable_feast_dates_day ON movable_feast_dates(year, day_of_year);
 
--- Таблиця для відстеження push-нотифікацій
+-- Push-нотифікації: і розклад (рядки зі слотом від schedule_notifications.py,
+-- 'pending' до свого слоту), і історія відправлених вручну (без слоту).
+-- Слот, у якому не було жодного пристрою, отримує статус 'skipped'.
 CREATE TABLE IF NOT EXISTS notifications (
     id SERIAL PRIMARY KEY,
     event_id INTEGER REFERENCES events(id) ON DELETE CASCADE,
     notification_date DATE NOT NULL,
+    notification_slot SMALLINT, -- слот доби (див. schedule_notifications.py), NULL для історії
     sent_at TIMESTAMP,
-    status VARCHAR(50) DEFAULT 'pending', -- pending, sent, failed
+    status VARCHAR(50) DEFAULT 'pending', -- pending, sent, failed, skipped
     error_message TEXT,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
-CREATE INDEX idx_notifications_date ON notifications(notification_date);
-CREATE INDEX idx_notifications_status ON notifications(status);
+CREATE INDEX IF NOT EXISTS idx_notifications_date ON notifications(notification_date);
+CREATE INDEX IF NOT EXISTS idx_notifications_status ON notifications(status);
+
+-- Міграція для баз, створених до планування нотифікацій за слотами
+ALTER TABLE notifications ADD COLUMN IF NOT EXISTS notification_slot SMALLINT;
+
+-- Розклад: рядки одного слоту дня лежать поряд в індексі, тож відправник
+-- бере їх одним проходом; унікальність робить повторне планування безпечним
+CREATE UNIQUE INDEX IF NOT EXISTS idx_notifications_schedule
+    ON notifications(notification_date, notification_slot, event_id)
+    WHERE notification_slot IS NOT NULL;
 
 -- Таблиця FCM токенів (для push-нотифікацій без реєстрації)
 CREATE TABLE IF NOT EXISTS device_tokens (
@@ -61,7 +191,7 @@ CREATE TABLE IF NOT EXISTS device_tokens (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
-CREATE INDEX idx_device_tokens_active ON device_tokens(is_active);
+CREATE INDEX IF NOT EXISTS idx_device_tokens_active ON device_tokens(is_active);
 
 -- Таблиця налаштувань користувачів (прив'язані до токену)
 CREATE TABLE IF NOT EXISTS user_preferences (
@@ -86,12 +216,14 @@ END;
 $$ language 'plpgsql';
 
 -- Тригер для events
+DROP TRIGGER IF EXISTS update_events_updated_at ON events;
 CREATE TRIGGER update_events_updated_at
     BEFORE UPDATE ON events
     FOR EACH ROW
     EXECUTE FUNCTION update_updated_at_column();
 
 -- Тригер для user_preferences
+DROP TRIGGER IF EXISTS update_user_preferences_updated_at ON user_preferences;
 CREATE TRIGGER update_user_preferences_updated_at
     BEFORE UPDATE ON user_preferences
     FOR EACH ROW
@@ -100,6 +232,8 @@ CREATE TRIGGER update_user_preferences_updated_at
 -- Коментарі до таблиць
 COMMENT ON TABLE events IS 'Календарні події - українські язичницькі свята';
 COMMENT ON TABLE event_images IS 'Зображення для подій';
+COMMENT ON TABLE movable_feasts IS 'Рухомі свята відносно Великодня';
+COMMENT ON TABLE movable_feast_dates IS 'Дати рухомих свят за роками';
 COMMENT ON TABLE notifications IS 'Історія відправлених нотифікацій';
 COMMENT ON TABLE device_tokens IS 'FCM токени для push-нотифікацій';
 COMMENT ON TABLE user_preferences IS 'Налаштування користувачів';